@@ -1,5 +1,7 @@
 # main.py
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from inventory_management import InventoryManager
 from demand_forecasting import DemandPredictor
 from supplier_integration import SupplierIntegration
@@ -7,6 +9,7 @@ from notification_system import NotificationService
 
 class AutomatedReorderingSystem:
     def __init__(self, config):
+        self.config = config
         self.inventory_manager = InventoryManager(config)
         self.demand_predictor = DemandPredictor(config)
         self.supplier_integration = SupplierIntegration(config)
@@ -16,6 +19,8 @@ class AutomatedReorderingSystem:
         self.logger = logging.getLogger(__name__)
 
     def run_reordering_cycle(self):
+        if self.config.get('pipeline', {}).get('concurrent'):
+            return self.run_concurrent_cycle()
         try:
             # 1. Forecast Demand
             demand_forecast = self.demand_predictor.predict_demand()
@@ -49,6 +54,84 @@ class AutomatedReorderingSystem:
             self.logger.error(f"Reordering cycle failed: {e}")
             self.notification_service.send_error_notification(str(e))
 
+    def run_concurrent_cycle(self):
+        """Same steps as the serial cycle, overlapped.
+
+        Forecasting and the inventory snapshot run side by side. Purchase
+        orders go through a bounded pool, and each product's notification
+        is queued as soon as its order succeeds. A failing product is
+        recorded in the report and doesn't stop the others. Returns the
+        cycle report.
+        """
+        pipeline = self.config.get('pipeline', {})
+        started = time.perf_counter()
+        report = {'products': 0, 'due': 0, 'ordered': 0, 'notified': 0, 'failures': [], 'seconds': None}
+
+        try:
+            # 1 + 2. Forecast demand while reading the current inventory
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                forecast_future = pool.submit(self.demand_predictor.predict_demand)
+                inventory_future = pool.submit(self.inventory_manager.get_current_inventory)
+                demand_forecast = forecast_future.result()
+                current_inventory = inventory_future.result()
+
+            # 3. Calculate Reorder Needs
+            reorder_recommendations = self.inventory_manager.calculate_reorder_points(
+                current_inventory,
+                demand_forecast
+            )
+        except Exception as e:
+            # Nothing can be ordered without a forecast and a snapshot
+            self.logger.error(f"Reordering cycle failed: {e}")
+            self.notification_service.send_error_notification(str(e))
+            report['failures'].append({'product': None, 'stage': 'plan', 'error': str(e)})
+            report['seconds'] = time.perf_counter() - started
+            return report
+
+        due = {product: details['quantity'] for product, details in reorder_recommendations.items()
+               if details['should_reorder']}
+        report['products'] = len(reorder_recommendations)
+        report['due'] = len(due)
+
+        # 4 + 5. Purchase orders and notifications, isolated per product
+        with ThreadPoolExecutor(max_workers=pipeline.get('order_workers', 16)) as order_pool, \
+                ThreadPoolExecutor(max_workers=pipeline.get('notification_workers', 8)) as notify_pool:
+            orders = {order_pool.submit(self.supplier_integration.create_purchase_order, product, quantity): product
+                      for product, quantity in due.items()}
+            notifications = {}
+            for future in as_completed(orders):
+                product = orders[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Purchase order for {product} failed: {e}")
+                    report['failures'].append({'product': product, 'stage': 'order', 'error': str(e)})
+                    continue
+                report['ordered'] += 1
+                self.logger.info(f"Reorder for {product}: {due[product]} units")
+                notifications[notify_pool.submit(self.notification_service.send_reorder_notification,
+                                                 product, due[product])] = product
+
+            for future in as_completed(notifications):
+                product = notifications[future]
+                try:
+                    future.result()
+                    report['notified'] += 1
+                except Exception as e:
+                    self.logger.error(f"Reorder notification for {product} failed: {e}")
+                    report['failures'].append({'product': product, 'stage': 'notify', 'error': str(e)})
+
+        report['seconds'] = time.perf_counter() - started
+        self.logger.info(
+            f"Reordering cycle: {report['due']}/{report['products']} due, {report['ordered']} ordered, "
+            f"{report['notified']} notified, {len(report['failures'])} failed in {report['seconds']:.1f}s")
+        if report['failures']:
+            # One summary instead of an error notification per product
+            failed = ', '.join(str(f['product']) for f in report['failures'][:20])
+            self.notification_service.send_error_notification(
+                f"{len(report['failures'])} reorder steps failed: {failed}")
+        return report
+
 def main():
     # Configuration can be loaded from a config file or environment
     config = {
@@ -56,6 +139,12 @@ def main():
         'reorder_thresholds': {
             'min_stock_days': 14,
             'max_stock_days': 45
+        },
+        # Overlap forecasting/inventory and fan out supplier and notification calls
+        'pipeline': {
+            'concurrent': True,
+            'order_workers': 16,
+            'notification_workers': 8
         }
     }
     
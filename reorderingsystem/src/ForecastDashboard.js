@@ -105,7 +105,7 @@ const InventoryDashboard = () => {
     try {
       const [summary, chart, forecast, rules, orderData] = await Promise.all([
         fetch('http://localhost:8000/api/inventory/summary').then(res => res.json()),
-        fetch('http://localhost:8000/api/inventory/chart-data').then(res => res.json()),
+        fetch('http://localhost:8000/api/inventory/chart-data?start=2024-01-01&points=500').then(res => res.json()),
         fetch('http://localhost:8000/api/inventory/forecast').then(res => res.json()),
         fetch('http://localhost:8000/api/inventory/reorder-rules').then(res => res.json()),
         fetch('http://localhost:8000/api/inventory/orders').then(res => res.json())
@@ -0,0 +1,136 @@
+"""SQLite storage for shortage alert state, shared by every uvicorn worker.
+
+Alerts are keyed by (material, horizon, alert type). Each evaluation of a
+ledger is recorded in one write transaction. The transaction stores the
+evaluation's result for that ledger version, so other workers and later
+requests reuse it without re-scanning. It upserts the alerts, retires the
+ones that disappeared, and claims the notifications that are due.
+
+BEGIN IMMEDIATE takes SQLite's write lock, which also serializes separate
+processes. Two workers that evaluate the same change concurrently
+therefore can't both claim its notification. An alert is due when its
+content (everything except id and timestamp) differs from what was last
+sent for that key, or when the same content was last sent more than
+`dedup_window` seconds ago.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlite_store import DB_PATH, SQLiteStore
+
+# Identical alerts for the same key are sent again at most once per window
+DEDUP_WINDOW_SECONDS = int(os.environ.get('STOCKFLOW_ALERT_DEDUP_SECONDS', 24 * 3600))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_state (
+    material_id TEXT NOT NULL,
+    horizon_days INTEGER NOT NULL,
+    alert_type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    alert TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    notified_hash TEXT,
+    notified_at TEXT,
+    PRIMARY KEY (material_id, horizon_days, alert_type)
+);
+CREATE INDEX IF NOT EXISTS idx_alert_state_source ON alert_state (source, active);
+
+CREATE TABLE IF NOT EXISTS alert_evaluations (
+    source TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    alerts TEXT NOT NULL,
+    evaluated_at TEXT NOT NULL
+);
+"""
+
+KEY_FIELDS = ('material_id', 'horizon_days', 'type')
+# Fields that change on every evaluation without the alert itself changing
+VOLATILE_FIELDS = ('id', 'timestamp')
+
+
+def alert_key(alert):
+    return str(alert['material_id']), int(alert['horizon_days']), str(alert['type'])
+
+
+def content_hash(alert):
+    content = {k: v for k, v in alert.items() if k not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class AlertStore(SQLiteStore):
+    schema = SCHEMA
+
+    def __init__(self, path=DB_PATH, dedup_window=DEDUP_WINDOW_SECONDS):
+        super().__init__(path)
+        self.dedup_window = timedelta(seconds=dedup_window)
+
+    def evaluation(self, source, version):
+        """Alerts recorded for `source` at `version`, or None if that version wasn't evaluated yet."""
+        row = self._connection().execute(
+            "SELECT alerts FROM alert_evaluations WHERE source = ? AND version = ?", (source, version)).fetchone()
+        return json.loads(row['alerts']) if row else None
+
+    def record(self, source, version, alerts, now=None):
+        """Store one evaluation of `source` and return the alerts whose notification is due.
+
+        Every alert dict needs material_id, horizon_days and type; the rest
+        is free-form and JSON-serializable. Alerts of `source` that aren't in
+        `alerts` any more are marked inactive.
+        """
+        now = now or datetime.now()
+        stamp = now.isoformat(timespec='seconds')
+        resend_before = (now - self.dedup_window).isoformat(timespec='seconds')
+        hashes = [content_hash(alert) for alert in alerts]
+
+        with self._transaction() as conn:
+            previous = {
+                (row['material_id'], row['horizon_days'], row['alert_type']): row
+                for row in conn.execute("SELECT * FROM alert_state WHERE source = ?", (source,))
+            }
+            due, rows = [], []
+            for alert, digest in zip(alerts, hashes):
+                key = alert_key(alert)
+                old = previous.pop(key, None)
+                notified_hash = old['notified_hash'] if old else None
+                notified_at = old['notified_at'] if old else None
+                if notified_hash != digest or notified_at is None or notified_at < resend_before:
+                    due.append(alert)
+                    notified_hash, notified_at = digest, stamp
+                rows.append((*key, source, json.dumps(alert, default=str), digest,
+                             old['first_seen'] if old else stamp, stamp, notified_hash, notified_at))
+
+            conn.executemany(
+                "INSERT INTO alert_state (material_id, horizon_days, alert_type, source, alert, content_hash,"
+                " active, first_seen, updated_at, notified_hash, notified_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)"
+                " ON CONFLICT (material_id, horizon_days, alert_type) DO UPDATE SET"
+                " source = excluded.source, alert = excluded.alert, content_hash = excluded.content_hash,"
+                " active = 1, updated_at = excluded.updated_at,"
+                " notified_hash = excluded.notified_hash, notified_at = excluded.notified_at",
+                rows)
+            # Whatever wasn't raised this time has cleared
+            conn.executemany(
+                "UPDATE alert_state SET active = 0, updated_at = ?"
+                " WHERE material_id = ? AND horizon_days = ? AND alert_type = ?",
+                [(stamp, *key) for key, row in previous.items() if row['active']])
+            conn.execute(
+                "INSERT INTO alert_evaluations (source, version, alerts, evaluated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (source) DO UPDATE SET version = excluded.version, alerts = excluded.alerts,"
+                " evaluated_at = excluded.evaluated_at",
+                (source, version, json.dumps(alerts, default=str), stamp))
+        return due
+
+    def active_alerts(self, material_id=None):
+        """Alerts raised by the latest evaluation of their source, as they were recorded."""
+        query = "SELECT alert FROM alert_state WHERE active = 1"
+        params = []
+        if material_id is not None:
+            query += " AND material_id = ?"
+            params.append(str(material_id))
+        query += " ORDER BY material_id, horizon_days, alert_type"
+        return [json.loads(row['alert']) for row in self._connection().execute(query, params)]
@@ -0,0 +1,160 @@
+"""Walk-forward backtests of candidate demand models across every SKU.
+
+Each Material/Plant series is resampled to biweekly Order Qty. For every
+feature setting (number of lags, rolling window), its feature matrix is
+built once and shared by all the candidate models. A candidate is refit at
+each of the last `origins` periods on everything before it, then predicts
+that period, which gives one-step errors like the reorder cycle sees.
+Features use past periods only; the rolling statistics start at lag 1.
+
+Series x feature-setting tasks run in a bounded process pool, as in
+batch_forecast.py. The report has MAPE and RMSE per SKU and candidate,
+ranked by RMSE relative to each SKU's mean demand, averaged over SKUs.
+
+The winner file names the best candidate among those scored with the
+feature setting demand_model builds (its LAGS and ROLLING_WINDOW). The
+candidates are demand_model's, and every later fit of the reorder and
+batch forecast models uses the winner (see demand_model.chosen_candidate).
+
+Usage: python backtest.py 1111003.csv [--workers N] [--origins N] [--out backtest.csv]
+                                      [--winner backtest_winner.json]
+"""
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from batch_forecast import SERIES_KEYS, iter_series
+from demand_model import CANDIDATES, LAGS, MODEL_CHOICE_PATH, ROLLING_WINDOW, make_estimator
+from ledger_snapshot import load_ledger, PROJECTIONS
+
+# The first is the setting the production features use
+FEATURE_SETS = [
+    {'lags': LAGS, 'window': ROLLING_WINDOW},
+    {'lags': 6, 'window': 4},
+]
+
+DEFAULT_ORIGINS = 6
+# Periods a candidate must be trained on before its first forecast
+MIN_TRAIN_PERIODS = 8
+
+
+def biweekly_demand(series):
+    """Biweekly Order Qty totals of one series, as (period end dates, values)."""
+    totals = series.set_index('Posting Date')['Order Qty'].resample('2W').sum()
+    return totals.index, totals.to_numpy(dtype=float)
+
+
+def feature_matrix(qty, dates, lags, window):
+    """Rows for periods lags.. onward: lags first (lag_1 in column 0), then rolling and calendar features."""
+    past = pd.Series(qty).shift(1)
+    columns = [pd.Series(qty).shift(i) for i in range(1, lags + 1)]
+    columns.append(past.rolling(window, min_periods=1).mean())
+    columns.append(past.rolling(window, min_periods=2).std().fillna(0.0))
+    columns.append(pd.Series(dates.month))
+    columns.append(pd.Series(dates.quarter))
+    X = pd.concat(columns, axis=1).to_numpy(dtype=float)
+    return X[lags:], qty[lags:]
+
+
+def _scores(actual, predicted):
+    actual, predicted = np.asarray(actual), np.asarray(predicted)
+    nonzero = actual != 0
+    return {
+        'rmse': float(np.sqrt(np.mean((actual - predicted) ** 2))),
+        # Periods without demand have no percentage error
+        'mape': float(np.mean(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero]))) if nonzero.any() else None,
+        'scale': float(np.mean(np.abs(actual))),
+    }
+
+
+def backtest_series(key, series, feature_set, origins=DEFAULT_ORIGINS, candidates=None):
+    """Walk-forward scores of every candidate on one series and feature setting. Never raises."""
+    candidates = candidates or list(CANDIDATES)
+    base = dict(zip(SERIES_KEYS, key), **feature_set)
+    try:
+        dates, qty = biweekly_demand(series.sort_values('Posting Date'))
+        X, y = feature_matrix(qty, dates, **feature_set)
+        first_origin = max(MIN_TRAIN_PERIODS, len(y) - origins)
+        if first_origin >= len(y):
+            return [dict(base, model=name, status='insufficient_history') for name in candidates]
+
+        results = []
+        for name in candidates:
+            predicted = []
+            for origin in range(first_origin, len(y)):
+                model = make_estimator(name).fit(X[:origin], y[:origin])
+                predicted.append(model.predict(X[origin:origin + 1])[0])
+            actual = y[first_origin:]
+            results.append(dict(base, model=name, status='ok', forecasts=len(actual), **_scores(actual, predicted)))
+        return results
+    except Exception as e:
+        return [dict(base, model=name, status='error', error=str(e)) for name in candidates]
+
+
+def backtest(df, origins=DEFAULT_ORIGINS, feature_sets=FEATURE_SETS, candidates=None,
+             max_workers=None, max_pending=None):
+    """Backtest every candidate and feature setting on every Material/Plant series in df."""
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or max_workers * 2
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for key, series in iter_series(df):
+            for feature_set in feature_sets:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        results.extend(f.result())
+                pending.add(pool.submit(backtest_series, key, series, feature_set, origins, candidates))
+        for f in wait(pending).done:
+            results.extend(f.result())
+
+    return pd.DataFrame(results).sort_values(SERIES_KEYS + ['model', 'lags', 'window']).reset_index(drop=True)
+
+
+def leaderboard(results):
+    """Candidates ranked by mean scale-free RMSE over the SKUs they could be scored on."""
+    scored = results[results['status'] == 'ok'].copy()
+    scored['relative_rmse'] = scored['rmse'] / scored['scale'].where(scored['scale'] > 0)
+    # Per-SKU winner on the same measure
+    best = scored.loc[scored.groupby(SERIES_KEYS, observed=True)['relative_rmse'].idxmin().dropna()]
+    wins = best.groupby(['model', 'lags', 'window']).size().rename('sku_wins')
+    board = scored.groupby(['model', 'lags', 'window']).agg(
+        relative_rmse=('relative_rmse', 'mean'),
+        rmse=('rmse', 'mean'),
+        mape=('mape', 'median'),
+        skus=('rmse', 'size'),
+    ).join(wins).fillna({'sku_wins': 0})
+    return board.sort_values('relative_rmse').reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('ledger', help="movement ledger export, e.g. 1111003.csv")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--origins', type=int, default=DEFAULT_ORIGINS)
+    parser.add_argument('--out', default='backtest.csv')
+    parser.add_argument('--winner', default=MODEL_CHOICE_PATH)
+    args = parser.parse_args()
+
+    results = backtest(load_ledger(args.ledger, columns=PROJECTIONS['series']),
+                       origins=args.origins, max_workers=args.workers)
+    results.to_csv(args.out, index=False)
+    board = leaderboard(results)
+    print(board.to_string(index=False))
+    # Only a candidate scored on the production feature setting can be served
+    servable = board[(board['lags'] == LAGS) & (board['window'] == ROLLING_WINDOW)]
+    if len(servable):
+        winner = servable.iloc[0]
+        with open(args.winner, 'w') as f:
+            json.dump({'model': winner['model'], 'lags': int(winner['lags']), 'window': int(winner['window']),
+                       'relative_rmse': float(winner['relative_rmse'])}, f, indent=2)
+        print(f"Winner: {winner['model']} (lags={winner['lags']}, window={winner['window']}) -> {args.winner}")
+        if board.index[0] != servable.index[0]:
+            best = board.iloc[0]
+            print(f"Best overall: {best['model']} (lags={best['lags']}, window={best['window']}); "
+                  f"its feature setting isn't built in production")
@@ -0,0 +1,85 @@
+"""Batch demand forecasting for every Material/Plant series in a ledger.
+
+The biweekly features of every SKU and plant come from one feature table
+(see feature_store.py), which the CLI keeps under features/ and extends as
+the export grows. Each series' feature matrix is then trained and forecast
+in a worker process. At most `max_pending` series are in flight at once, so
+memory stays bounded however many SKUs the export holds.
+
+Usage: python batch_forecast.py 1111003.csv [--workers N] [--out forecasts.csv]
+"""
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from demand_model import train_matrix
+from feature_store import FeatureTable, feature_store
+from ledger_cache import ledger_fingerprint
+from ledger_snapshot import load_ledger, PROJECTIONS
+
+SERIES_KEYS = ['Material', 'Plant']
+SERIES_COLUMNS = ['Posting Date', 'Order Qty', 'Total stock', 'Amt.in Loc.Cur.']
+
+# Biweekly periods needed before a series is worth fitting (3 lags + a test split)
+MIN_PERIODS = 8
+
+
+def forecast_series(key, X, y, periods):
+    """Train and forecast one series from its feature matrix. Never raises; failures are reported per row."""
+    result = dict(zip(SERIES_KEYS, key), periods=periods)
+    try:
+        if periods < MIN_PERIODS:
+            result.update(forecast=None, status='insufficient_history')
+            return result
+        model, _ = train_matrix(X, y)
+        result.update(forecast=float(model.predict(X[-1:])[0]), status='ok')
+    except Exception as e:
+        result.update(forecast=None, status='error', error=str(e))
+    return result
+
+
+def iter_series(df, keys=SERIES_KEYS):
+    df = df.dropna(subset=['Posting Date'])
+    for key, group in df.groupby(keys, observed=True, sort=False):
+        yield key, group[SERIES_COLUMNS]
+
+
+def batch_forecast(df, max_workers=None, max_pending=None, table=None):
+    """Forecast next-period demand for every Material/Plant series in df.
+
+    `table` is df's FeatureTable keyed by SERIES_KEYS, if the caller has one.
+    Returns one row per series with its forecast and a status column.
+    """
+    table = table or FeatureTable.build(df, SERIES_KEYS)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or max_workers * 2
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for key in table.series():
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(f.result() for f in done)
+            X, y, _ = table.matrix(key)
+            pending.add(pool.submit(forecast_series, key, X, y, table.periods(key)))
+        results.extend(f.result() for f in wait(pending).done)
+
+    columns = SERIES_KEYS + ['forecast', 'periods', 'status', 'error']
+    return pd.DataFrame(results, columns=columns).sort_values(SERIES_KEYS).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('ledger', help="movement ledger export, e.g. 1111003.csv")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='forecasts.csv')
+    args = parser.parse_args()
+
+    ledger = load_ledger(args.ledger, columns=PROJECTIONS['series'])
+    features = feature_store.get(ledger, ledger_fingerprint(args.ledger), keys=SERIES_KEYS)
+    table = batch_forecast(ledger, max_workers=args.workers, table=features)
+    table.to_csv(args.out, index=False)
+    print(f"Forecast {int((table['status'] == 'ok').sum())}/{len(table)} series -> {args.out}")
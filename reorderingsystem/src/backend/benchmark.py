@@ -0,0 +1,230 @@
+"""Timed scenarios for the API and the modelling steps on synthetic ledgers.
+
+The benchmark generates a synthetic ledger pair (see synthetic_ledger.py)
+into a scratch directory and runs from there, so the database, snapshots
+and models it creates never touch a real working directory. The API runs
+with its startup hooks (notification dispatcher, scheduler if enabled,
+prewarm), as a served worker would, and timing starts once the prewarm has
+finished. Each scenario gets one warm-up call and is then timed for
+--iterations calls. The report gives throughput, p50/p99 latency and the
+process's peak RSS after each scenario.
+
+Repeated GETs of an unchanged ledger are answered from the response cache.
+The "(uncached)" scenarios clear that cache before every call, and the
+"(after append)" ones append a posting to the ledger first, so the tail
+ingest, cache invalidation and incremental model update are timed too.
+
+With --baseline, p50 and p99 are compared with an earlier --out file. The
+exit status is 1 if any scenario slowed down by more than --tolerance.
+
+Usage: python benchmark.py [--rows N] [--materials N] [--years N] [--iterations N]
+                           [--only NAME ...] [--out results.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from synthetic_ledger import write_ledgers  # noqa: E402
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(name, func, iterations):
+    func()  # warm-up: caches, snapshots and models are built here
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - started
+    latencies = np.array(latencies)
+    return {
+        'name': name,
+        'iterations': iterations,
+        'throughput': iterations / total if total > 0 else None,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _request(client, method, path):
+    def call():
+        response = getattr(client, method)(path)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {path} -> {response.status_code}: {response.text[:200]}")
+    return call
+
+
+def _uncached(call):
+    """Clear the rendered-response cache before each call, so the body is rebuilt."""
+    from responses import body_cache
+
+    def run():
+        body_cache.clear()
+        call()
+    return run
+
+
+def _after_append(path, call):
+    """Append a copy of the ledger's last posting before each call."""
+    with open(path, 'rb') as f:
+        f.seek(max(0, os.path.getsize(path) - 4096))
+        posting = f.read().splitlines()[-1] + b'\n'
+
+    def run():
+        with open(path, 'ab') as f:
+            f.write(posting)
+        call()
+    return run
+
+
+def _wait_for_prewarm(main, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while main.PREWARM_ENABLED and 'prewarmed' not in main.startup_timings and time.perf_counter() < deadline:
+        time.sleep(0.1)
+
+
+@contextmanager
+def benchmark_scenarios():
+    """Yield (name, callable) pairs; imported lazily so the ledger exists in the cwd first."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from demand_model import create_features, train_model
+    from feature_store import FeatureTable
+    from holiday_features import days_to_nearest_holiday
+    from ledger_snapshot import load_ledger, parse_csv
+
+    ledger = load_ledger(main.LEDGER_PATH)
+    features = create_features(ledger)
+
+    scenarios = [
+        ('csv_parse', lambda: parse_csv(main.LEDGER_PATH)),
+        ('snapshot_load', lambda: load_ledger(main.LEDGER_PATH)),
+        ('create_features', lambda: create_features(ledger)),
+        ('feature_table', lambda: FeatureTable.build(ledger, ['Material'])),
+        ('train_model', lambda: train_model(features.copy())),
+        ('holiday_features', lambda: days_to_nearest_holiday(ledger['Posting Date'])),
+    ]
+    endpoints = [
+        ('get', '/api/inventory/summary'),
+        ('get', '/api/inventory/chart-data'),
+        ('get', '/api/inventory/chart-data?bucket=week&points=500'),
+        ('get', '/api/inventory/analysis'),
+        ('get', '/api/inventory/forecast'),
+        ('get', '/api/inventory/check-alerts'),
+        ('post', '/api/inventory/check-reorder'),
+        ('get', '/api/inventory/orders?limit=100'),
+        ('get', '/metrics'),
+    ]
+    uncached = ['/api/inventory/chart-data', '/api/inventory/analysis', '/api/inventory/forecast']
+    after_append = ['/api/inventory/summary', '/api/inventory/chart-data', '/api/inventory/forecast']
+
+    # Entering the client runs the startup hooks
+    with TestClient(main.app) as client:
+        _wait_for_prewarm(main)
+        for method, path in endpoints:
+            scenarios.append((f"{method.upper()} {path}", _request(client, method, path)))
+        for path in uncached:
+            scenarios.append((f"GET {path} (uncached)", _uncached(_request(client, 'get', path))))
+        # Last: they grow the ledger the other scenarios read
+        for path in after_append:
+            scenarios.append((f"GET {path} (after append)",
+                              _after_append(main.LEDGER_PATH, _request(client, 'get', path))))
+        yield scenarios
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose p50 or p99 grew by more than `tolerance` (a fraction) over baseline."""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['name'])
+        if old is None or 'error' in result or 'error' in old:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            if old[key] > 0 and result[key] > old[key] * (1 + tolerance):
+                regressions.append(f"{result['name']}: {key} {old[key]:.2f} -> {result[key]:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--materials', type=int, default=50)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help="run only scenarios whose name contains one of these")
+    parser.add_argument('--workdir', help="scratch directory (default: a new temporary one)")
+    parser.add_argument('--out', help="write the results as JSON")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    # Resolve output paths before moving into the scratch directory
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix='stockflow-bench-')
+    started = time.perf_counter()
+    write_ledgers(workdir, args.rows, args.materials, args.years, args.seed)
+    print(f"Generated {args.rows} rows in {workdir} ({time.perf_counter() - started:.1f}s)")
+    os.chdir(workdir)
+
+    results = []
+    with benchmark_scenarios() as selected:
+        for name, func in selected:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            try:
+                result = run_scenario(name, func, args.iterations)
+            except Exception as e:
+                result = {'name': name, 'error': str(e)}
+            results.append(result)
+            if 'error' in result:
+                print(f"{name:55} ERROR {result['error']}")
+            else:
+                print(f"{name:55} {result['throughput']:9.1f}/s  p50 {result['p50_ms']:9.2f}ms  "
+                      f"p99 {result['p99_ms']:9.2f}ms  rss {result['peak_rss_mb'] or 0:7.0f}MB")
+
+    report = {
+        'config': {k: getattr(args, k) for k in ('rows', 'materials', 'years', 'seed', 'iterations')},
+        'results': results,
+    }
+    if out:
+        with open(out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Biweekly demand features and the estimator trained on them.
+
+The estimator is the winner of the last walk-forward backtest (backtest.py
+writes it to STOCKFLOW_MODEL_CHOICE, backtest_winner.json by default), or
+the RandomForest used before backtests existed when there is no winner
+file, or when the winner was scored on a different feature setting than
+FEATURES. A new winner is picked up by the next fit, i.e. the next ledger
+version or a forced retrain.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+from instrumentation import span, timed
+
+logger = logging.getLogger(__name__)
+
+DAILY_AGGREGATIONS = {
+    'Order Qty': 'sum',
+    'Total stock': 'last',
+    'Amt.in Loc.Cur.': 'sum'
+}
+
+LAGS = 3
+# Model inputs, in the column order train_model() fits them
+FEATURES = ['month', 'quarter', 'rolling_mean', 'rolling_std', 'pct_change'] + [f'lag_{i}' for i in range(1, LAGS + 1)]
+TRAIN_SHARE = 0.8
+# Periods in rolling_mean/rolling_std
+ROLLING_WINDOW = 2
+
+MODEL_CHOICE_PATH = os.environ.get('STOCKFLOW_MODEL_CHOICE', 'backtest_winner.json')
+# Estimators the backtest compares; the default is the one every fit used before
+CANDIDATES = ('naive', 'linear', 'ridge', 'rf_depth10', 'rf_depth5', 'gbr')
+DEFAULT_CANDIDATE = 'rf_depth10'
+
+def daily_aggregates(df):
+    # Group by posting date and calculate daily metrics
+    return df.groupby('Posting Date').agg(DAILY_AGGREGATIONS).reset_index()
+
+def create_features(df):
+    return biweekly_features(daily_aggregates(df))
+
+@timed('feature_build')
+def biweekly_features(daily_data):
+    daily_data = daily_data.copy()
+    
+    # Create time-based features
+    daily_data['month'] = daily_data['Posting Date'].dt.month
+    daily_data['quarter'] = daily_data['Posting Date'].dt.quarter
+    daily_data['year'] = daily_data['Posting Date'].dt.year
+    
+    # Resample to biweekly frequency
+    biweekly = daily_data.set_index('Posting Date').resample('2W').agg({
+        'Order Qty': 'sum',
+        'Total stock': 'last',
+        'Amt.in Loc.Cur.': 'sum',
+        'month': 'first',
+        'quarter': 'first',
+        'year': 'first'
+    }).reset_index()
+    
+    # Calculate rolling statistics
+    biweekly['rolling_mean'] = biweekly['Order Qty'].rolling(window=ROLLING_WINDOW, min_periods=1).mean()
+    biweekly['rolling_std'] = biweekly['Order Qty'].rolling(window=ROLLING_WINDOW, min_periods=1).std()
+    # A zero-demand period makes the next change infinite; treat it as missing
+    biweekly['pct_change'] = biweekly['Order Qty'].pct_change().replace([np.inf, -np.inf], np.nan)
+    
+    # Fill missing values
+    biweekly = biweekly.bfill().ffill()
+    return biweekly
+
+def add_lags(df):
+    # Adds the lag columns to df itself and returns the complete rows
+    for i in range(1, LAGS + 1):
+        df[f'lag_{i}'] = df['Order Qty'].shift(i)
+    return df.dropna()
+
+class LastValue:
+    """Naive baseline: next period repeats the last one (the lag_1 column)."""
+
+    def __init__(self, column=0):
+        self.column = column
+
+    def fit(self, X, y):
+        return self
+
+    def predict(self, X):
+        return np.asarray(X)[:, self.column]
+
+def make_estimator(name, lag_column=0):
+    """A new, unfitted estimator for one of CANDIDATES; X[:, lag_column] holds lag_1."""
+    # Imported on first fit: sklearn dominates the API's import time
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression, Ridge
+    factories = {
+        'naive': lambda: LastValue(lag_column),
+        'linear': LinearRegression,
+        'ridge': lambda: Ridge(alpha=1.0),
+        'rf_depth10': lambda: RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42, n_jobs=1),
+        'rf_depth5': lambda: RandomForestRegressor(n_estimators=100, max_depth=5, random_state=42, n_jobs=1),
+        'gbr': lambda: GradientBoostingRegressor(n_estimators=100, max_depth=3, random_state=42),
+    }
+    return factories[name]()
+
+def chosen_candidate(path=None):
+    """The backtest winner if it was scored on this module's feature setting, else DEFAULT_CANDIDATE."""
+    path = path or MODEL_CHOICE_PATH
+    try:
+        with open(path) as f:
+            winner = json.load(f)
+    except FileNotFoundError:
+        return DEFAULT_CANDIDATE
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable model choice %s: %s", path, e)
+        return DEFAULT_CANDIDATE
+    if winner.get('model') not in CANDIDATES:
+        logger.warning("Ignoring unknown model %r in %s", winner.get('model'), path)
+        return DEFAULT_CANDIDATE
+    if (winner.get('lags'), winner.get('window')) != (LAGS, ROLLING_WINDOW):
+        logger.warning("Ignoring %s: scored with lags=%s, window=%s, but features use lags=%s, window=%s",
+                       path, winner.get('lags'), winner.get('window'), LAGS, ROLLING_WINDOW)
+        return DEFAULT_CANDIDATE
+    return winner['model']
+
+def fit_estimator(X, y):
+    model = make_estimator(chosen_candidate(), lag_column=FEATURES.index('lag_1'))
+    with span('model_fit'):
+        model.fit(X, y)
+    return model
+
+def train_matrix(X, y):
+    """train_model() on a ready feature matrix (e.g. from feature_store); returns the model and its training rows."""
+    train_size = int(len(y) * TRAIN_SHARE)
+    return fit_estimator(X[:train_size], y[:train_size]), train_size
+
+def train_model(df):
+    df = add_lags(df)
+    
+    train_size = int(len(df) * TRAIN_SHARE)
+    train_data = df[:train_size]
+    test_data = df[train_size:]
+    
+    # Fit on a plain array so the model predicts from feature_store matrices as well
+    X_train = np.ascontiguousarray(train_data[FEATURES], dtype=float)
+    model = fit_estimator(X_train, train_data['Order Qty'].to_numpy(dtype=float))
+    return model, list(FEATURES), test_data
+
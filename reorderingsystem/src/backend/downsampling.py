@@ -0,0 +1,60 @@
+"""Point-count reduction for chart series.
+
+Both functions return sorted row positions to keep, always including the
+first and last point, so callers can take the matching rows of every column.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: keeps the visual shape of a line."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Missing values would poison the triangle areas; treat them as flat
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, threshold):
+    """Keep the minimum and maximum of each bucket, so spikes are never dropped."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = (threshold - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(int)
+    keep = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        window = y[lo:hi]
+        if np.isnan(window).all():
+            keep.append(lo)
+            continue
+        keep.extend((lo + int(np.nanargmin(window)), lo + int(np.nanargmax(window))))
+    return np.unique(keep)
+
+
+DOWNSAMPLERS = {
+    'lttb': lambda x, y, n: lttb_indices(x, y, n),
+    'minmax': lambda x, y, n: minmax_indices(y, n),
+}
@@ -0,0 +1,254 @@
+"""Materialized demand features per series and period, versioned by ledger fingerprint.
+
+create_features() rebuilds the biweekly totals, rolling statistics,
+pct_change and lags from raw postings on every call. A FeatureTable keeps
+them for every series of a ledger at one weekly-anchored frequency. A
+series is the ledger as a whole, or one per Material or Material/Plant. The
+periods line up with what resample() gives each series on its own: they end
+on Sundays, starting with the first Sunday on or after its first posting.
+
+Totals of periods that ended before the table's cutoff (the day of its last
+posting) are settled. When the ledger grows, only postings from the last
+period before the cutoff onward are grouped again. The derived columns are
+then recomputed over the period table, which is small. If the settled
+postings changed (the export was regenerated, or back-dated rows arrived),
+the table is rebuilt.
+
+FeatureStore keeps the latest table per (keys, frequency) in memory and
+under <root>/ on disk, keyed by ledger fingerprint and persisted like
+ModelRegistry's models (see versioned_store). One worker builds a version
+while the others wait for its file.
+Training and inference read the same contiguous float64 matrices from
+FeatureTable.matrix(), with columns in demand_model.FEATURES order.
+"""
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Week
+
+from demand_model import FEATURES, LAGS
+from instrumentation import CACHE_EVENTS, span
+from versioned_store import VersionedStore
+
+FREQUENCIES = {'week': 'W', 'biweek': '2W'}
+
+# Per-period totals, as biweekly_features() resamples them
+TOTALS = {'Order Qty': 'sum', 'Total stock': 'last', 'Amt.in Loc.Cur.': 'sum'}
+DERIVED = ['month', 'quarter', 'year', 'rolling_mean', 'rolling_std', 'pct_change']
+
+# Key column of the single ledger-wide series when a table has no keys
+ALL_SERIES = '_series'
+
+
+def _period_days(rule):
+    offset = to_offset(rule)
+    if not isinstance(offset, Week) or offset.weekday != 6:
+        raise ValueError(f"unsupported feature frequency {rule!r}; use one of {', '.join(FREQUENCIES.values())}")
+    return 7 * offset.n
+
+
+def _signature(rows):
+    return (len(rows), float(rows['Order Qty'].sum()), float(rows['Amt.in Loc.Cur.'].sum()))
+
+
+class FeatureTable:
+    """Period totals and features of every series in a ledger, for one frequency."""
+
+    def __init__(self, keys=(), rule='2W'):
+        self.keys = list(keys)
+        self.rule = rule
+        self.step = _period_days(rule)
+        self.group = self.keys or [ALL_SERIES]
+        self.totals = None  # one row per (series, period end), sorted
+        self.cutoff = None
+        self.signature = None
+        self.features = None
+        self._X = self._y = self._dates = None
+        self._rows = {}  # series -> (start, stop) in the complete-row matrix
+        self._periods = {}  # series -> number of periods
+
+    @classmethod
+    def build(cls, frame, keys=(), rule='2W'):
+        return cls(keys, rule).updated(frame)[0]
+
+    def updated(self, frame):
+        """(table, 'extend' or 'build'): this table brought up to date with frame."""
+        if not frame['Posting Date'].is_monotonic_increasing:
+            frame = frame.dropna(subset=['Posting Date']).sort_values('Posting Date', kind='stable')
+        dates = frame['Posting Date']
+        if self.totals is not None and len(frame):
+            settled = int(dates.searchsorted(self.cutoff))
+            if _signature(frame.iloc[:settled]) == self.signature:
+                # Postings of the period that was still open at the cutoff, and later ones
+                recent = frame.iloc[int(dates.searchsorted(self.cutoff - pd.Timedelta(days=self.step))):]
+                kept = self.totals[self.totals['Posting Date'] < self.cutoff]
+                return self._ingested(frame, kept, recent), 'extend'
+        return type(self)(self.keys, self.rule)._ingested(frame, None, frame), 'build'
+
+    def _ingested(self, frame, kept, recent):
+        table = copy.copy(self)
+        with span('feature_build'):
+            fresh = self._aggregate(recent, kept)
+            if kept is not None:
+                fresh = fresh[fresh['Posting Date'] >= self.cutoff]
+                fresh = pd.concat([kept, fresh], ignore_index=True)
+            table.totals = self._complete(fresh)
+            table.cutoff = frame['Posting Date'].iloc[-1].normalize() if len(frame) else pd.Timestamp.min
+            table.signature = _signature(frame.iloc[:int(frame['Posting Date'].searchsorted(table.cutoff))])
+            table._derive()
+        return table
+
+    def _series_frame(self, rows):
+        work = rows[['Posting Date', *TOTALS]].copy()
+        for column in self.keys:
+            work[column] = rows[column].astype(str).to_numpy()
+        if not self.keys:
+            work[ALL_SERIES] = 'all'
+        return work
+
+    def _aggregate(self, rows, kept):
+        """Totals per (series, period end) of rows; series in `kept` keep their period alignment."""
+        work = self._series_frame(rows.dropna(subset=['Posting Date']))
+        first = work.groupby(self.group, sort=False)['Posting Date'].transform('min').dt.normalize()
+        origin = first + pd.to_timedelta((6 - first.dt.weekday) % 7, unit='D')
+        if kept is not None and len(kept):
+            known = kept.groupby(self.group, sort=False)['Posting Date'].min().rename('origin').reset_index()
+            origin = work[self.group].merge(known, on=self.group, how='left')['origin'].fillna(origin.reset_index(drop=True))
+            origin.index = work.index
+        days = (work['Posting Date'].dt.normalize() - origin).dt.days.to_numpy()
+        work['period'] = origin + pd.to_timedelta(np.ceil(days / self.step) * self.step, unit='D')
+        totals = work.groupby(self.group + ['period'], sort=False).agg(
+            **{column: (column, how) for column, how in TOTALS.items()},
+            first_posting=('Posting Date', 'first'),
+        ).reset_index().rename(columns={'period': 'Posting Date'})
+        for column in TOTALS:
+            totals[column] = totals[column].astype(float)
+        return totals
+
+    def _complete(self, totals):
+        """Add the periods without postings between each series' first and last period."""
+        bounds = totals.groupby(self.group, sort=True)['Posting Date'].agg(['min', 'max'])
+        counts = ((bounds['max'] - bounds['min']).dt.days // self.step + 1).to_numpy()
+        series = np.repeat(np.arange(len(bounds)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        full = bounds.index.to_frame(index=False).iloc[series].reset_index(drop=True)
+        full['Posting Date'] = bounds['min'].to_numpy()[series] + pd.to_timedelta(offsets * self.step, unit='D')
+        full = full.merge(totals, on=self.group + ['Posting Date'], how='left')
+        return full.fillna({'Order Qty': 0.0, 'Amt.in Loc.Cur.': 0.0})
+
+    def _derive(self):
+        """The columns biweekly_features() and add_lags() add, for every series at once."""
+        features = self.totals.copy()
+        qty = features['Order Qty']
+        previous = features.groupby(self.group, sort=False)['Order Qty'].shift(1)
+
+        features['month'] = features['first_posting'].dt.month
+        features['quarter'] = features['first_posting'].dt.quarter
+        features['year'] = features['first_posting'].dt.year
+        # Two-period window with min_periods=1: the first period is its own mean, and has no std
+        features['rolling_mean'] = np.where(previous.isna(), qty, (qty + previous) / 2)
+        features['rolling_std'] = (qty - previous).abs() / np.sqrt(2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features['pct_change'] = (qty / previous - 1).replace([np.inf, -np.inf], np.nan)
+
+        filled = ['Total stock', *DERIVED]
+        by_series = features.groupby(self.group, sort=False)
+        features[filled] = by_series[filled].bfill()
+        features[filled] = features.groupby(self.group, sort=False)[filled].ffill()
+        for i in range(1, LAGS + 1):
+            features[f'lag_{i}'] = by_series['Order Qty'].shift(i)
+        self.features = features.drop(columns='first_posting')
+
+        # Rows with every input present, grouped by series so each one is a contiguous slice
+        matrix = features[FEATURES + ['Order Qty']].to_numpy(dtype=float)
+        complete = ~np.isnan(matrix).any(axis=1)
+        positions = by_series.indices
+        self._periods = {key: len(rows) for key, rows in positions.items()}
+        self._rows = {}
+        start = 0
+        for key, rows in positions.items():
+            count = int(complete[rows].sum())
+            self._rows[key] = (start, start + count)
+            start += count
+        order = np.concatenate([rows[complete[rows]] for rows in positions.values()]) if positions else []
+        self._X = np.ascontiguousarray(matrix[order, :-1])
+        self._y = np.ascontiguousarray(matrix[order, -1])
+        self._dates = features['Posting Date'].to_numpy()[order]
+
+    def _key(self, key):
+        if not self.keys:
+            return 'all'
+        if len(self.keys) == 1:
+            return str(key[0] if isinstance(key, tuple) else key)
+        return tuple(str(part) for part in key)
+
+    def series(self):
+        """Keys of every series in the table (None for the ledger-wide one)."""
+        return list(self._rows) if self.keys else [None]
+
+    def periods(self, key=None):
+        """Number of periods of a series, including those without postings."""
+        return self._periods.get(self._key(key), 0)
+
+    def frame(self, key=None):
+        """All periods of a series with totals and features, like biweekly_features() plus add_lags()."""
+        if not self.keys:
+            return self.features.reset_index(drop=True)
+        mask = np.ones(len(self.features), dtype=bool)
+        key = self._key(key)
+        for column, part in zip(self.keys, key if isinstance(key, tuple) else (key,)):
+            mask &= (self.features[column] == part).to_numpy()
+        return self.features[mask].reset_index(drop=True)
+
+    def matrix(self, key=None):
+        """(X, y, period end dates) for the periods of a series with complete lags, oldest first.
+
+        X is a contiguous [periods x FEATURES] float64 view shared by every
+        caller; the last row is the latest period, which inference predicts from.
+        """
+        start, stop = self._rows.get(self._key(key), (0, 0))
+        return self._X[start:stop], self._y[start:stop], self._dates[start:stop]
+
+
+class FeatureStore(VersionedStore):
+    """Latest FeatureTable per (keys, frequency), persisted per ledger fingerprint."""
+
+    def __init__(self, root='features', keep_versions=2):
+        super().__init__(root, keep_versions)
+
+    @staticmethod
+    def _name(keys, rule):
+        return f"{'-'.join(keys) or 'all'}_{rule}".replace(' ', '_').replace('/', '_')
+
+    def get(self, frame, fingerprint, keys=(), rule='2W'):
+        """The table for `frame` (ledger version `fingerprint`), extending the previous version if possible."""
+        name = self._name(keys, rule)
+        loaded = self._loaded.get(name)
+        if loaded is not None and loaded[0] == fingerprint:
+            CACHE_EVENTS.inc('features', 'hit')
+            return loaded[1]
+
+        with self.locked(name):
+            loaded = self._loaded.get(name)
+            if loaded is not None and loaded[0] == fingerprint:
+                CACHE_EVENTS.inc('features', 'shared')
+                return loaded[1]
+
+            path = self._path(name, fingerprint)
+            if os.path.exists(path):
+                CACHE_EVENTS.inc('features', 'disk')
+                table = self._load(path)
+            else:
+                previous = loaded or self._latest(name)
+                table, how = (previous[1] if previous else FeatureTable(keys, rule)).updated(frame)
+                CACHE_EVENTS.inc('features', how)
+                self._dump(name, fingerprint, table)
+                self._prune(name)
+            self._loaded[name] = (fingerprint, table)
+            return table
+
+
+feature_store = FeatureStore()
@@ -0,0 +1,54 @@
+"""Holiday-proximity features for ledger dates.
+
+Holiday calendars are built once per (years, countries) pair as a sorted
+datetime64 array and cached. Offsets for a whole date column are then found
+with a single searchsorted call instead of scanning every holiday per row.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COUNTRIES = ('US', 'CA')
+HOLIDAY_WINDOW_DAYS = 15
+
+
+@lru_cache(maxsize=32)
+def holiday_calendar(years, countries=DEFAULT_COUNTRIES):
+    """Sorted, de-duplicated holiday dates for the given years and countries."""
+    import holidays
+
+    days = set()
+    for country in countries:
+        days.update(holidays.country_holidays(country, years=list(years)).keys())
+    return np.array(sorted(days), dtype='datetime64[D]')
+
+
+def days_to_nearest_holiday(dates, window=HOLIDAY_WINDOW_DAYS, countries=DEFAULT_COUNTRIES):
+    """Signed days from each date to its nearest holiday (positive = upcoming).
+
+    Dates with no holiday within `window` days, and missing dates, get 0.
+    When two holidays are equally close the upcoming one wins.
+    """
+    values = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy(dtype='datetime64[D]')
+    offsets = np.zeros(len(values), dtype=np.int64)
+    valid = ~np.isnat(values)
+    if not valid.any():
+        return offsets
+
+    days = values[valid]
+    first_year = days.min().astype(object).year
+    last_year = days.max().astype(object).year
+    # Pad by a year so dates near New Year still see the neighbouring holidays
+    calendar = holiday_calendar(tuple(range(first_year - 1, last_year + 2)), tuple(countries))
+
+    idx = np.searchsorted(calendar, days)
+    upcoming = (calendar[np.minimum(idx, len(calendar) - 1)] - days).astype(np.int64)
+    previous = (calendar[np.maximum(idx - 1, 0)] - days).astype(np.int64)
+    no_match = window + 1
+    upcoming = np.where(idx < len(calendar), upcoming, no_match)
+    previous = np.where(idx > 0, previous, -no_match)
+
+    nearest = np.where(upcoming <= -previous, upcoming, previous)
+    offsets[valid] = np.where(np.abs(nearest) <= window, nearest, 0)
+    return offsets
@@ -0,0 +1,149 @@
+"""Multi-step biweekly demand forecasts for the whole catalog at once.
+
+The ledger is turned into a dense (material x period) array of biweekly
+Order Qty on one shared calendar. A single pooled model is trained on
+every material's history. Its features are built only from earlier
+periods (lags 1-3, their mean, spread and change, plus the calendar), so
+each prediction can be fed back in as the next step's lag 1.
+forecast_horizon() then steps all materials forward together: one
+predict() call per period, however many materials are asked for.
+
+Prediction intervals come from the model's one-step errors on the most
+recent periods, widened with the square root of the step count.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from instrumentation import span, timed
+
+PERIOD_DAYS = 14
+LAGS = 3
+FEATURES = ['month', 'quarter', 'lag_1', 'lag_2', 'lag_3', 'rolling_mean', 'rolling_std', 'pct_change']
+
+# Share of the latest periods held out to measure forecast errors
+HOLDOUT_SHARE = 0.2
+# Residuals kept in the bundle for interval estimates
+MAX_RESIDUALS = 5000
+
+
+def demand_panel(df, key='Material'):
+    """Biweekly Order Qty per `key` value.
+
+    Returns (series ids, period start dates, totals array [series x period],
+    first active period per series). Periods without postings are zero.
+    """
+    df = df.dropna(subset=['Posting Date'])
+    origin = df['Posting Date'].min().normalize()
+    period = ((df['Posting Date'] - origin).dt.days // PERIOD_DAYS).to_numpy()
+    codes, series = pd.factorize(df[key].astype(str), sort=True)
+    n_series, n_periods = len(series), int(period.max()) + 1
+
+    flat = codes * n_periods + period
+    qty = pd.to_numeric(df['Order Qty'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    totals = np.bincount(flat, weights=qty, minlength=n_series * n_periods).reshape(n_series, n_periods)
+    postings = np.bincount(flat, minlength=n_series * n_periods).reshape(n_series, n_periods)
+
+    starts = origin + pd.to_timedelta(np.arange(n_periods) * PERIOD_DAYS, unit='D')
+    # A period the ledger only partly covers would read as a demand drop; forecast it instead
+    if df['Posting Date'].max() < starts[-1] + pd.Timedelta(days=PERIOD_DAYS - 1):
+        totals, postings, starts = totals[:, :-1], postings[:, :-1], starts[:-1]
+    first_active = np.where(postings.any(axis=1), postings.argmax(axis=1), len(starts))
+    return np.asarray(series), starts, totals, first_active
+
+
+def lag_features(lags, months, quarters):
+    """Feature matrix from lags [n x 3] (most recent first) and the target periods' calendar."""
+    lag_1, lag_2, lag_3 = lags[:, 0], lags[:, 1], lags[:, 2]
+    # Std (ddof=1) of two values is their distance over sqrt(2)
+    rolling_std = np.abs(lag_1 - lag_2) / np.sqrt(2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_change = np.where(lag_2 != 0, lag_1 / lag_2 - 1, 0.0)
+    return np.column_stack([
+        np.broadcast_to(months, lag_1.shape), np.broadcast_to(quarters, lag_1.shape),
+        lag_1, lag_2, lag_3, (lag_1 + lag_2) / 2, rolling_std, pct_change,
+    ])
+
+
+def _training_rows(totals, starts, first_active):
+    # windows[s, t] = totals[s, t:t + LAGS + 1]; the last entry is the target
+    windows = sliding_window_view(totals, LAGS + 1, axis=1)
+    target_period = np.arange(LAGS, totals.shape[1])
+    valid = target_period[None, :] >= first_active[:, None] + LAGS
+    series_idx, window_idx = np.nonzero(valid)
+    rows = windows[series_idx, window_idx]
+    periods = target_period[window_idx]
+    X = lag_features(rows[:, LAGS - 1::-1], starts.month.to_numpy()[periods], starts.quarter.to_numpy()[periods])
+    return X, rows[:, LAGS], periods
+
+
+def _new_model():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=100, max_depth=10, min_samples_leaf=2, n_jobs=-1, random_state=42)
+
+
+@timed('train_horizon')
+def train_horizon_model(df, key='Material'):
+    """Fit the pooled model on every series in df; returns a bundle for forecast_horizon()."""
+    series, starts, totals, first_active = demand_panel(df, key)
+    X, y, periods = _training_rows(totals, starts, first_active) if len(starts) > LAGS else ([], [], [])
+    if len(y) == 0:
+        raise ValueError(f"Need more than {LAGS} biweekly periods of history to forecast")
+
+    # One-step errors on the latest periods, from a model that hasn't seen them
+    cutoff = periods.min() + int((periods.max() - periods.min() + 1) * (1 - HOLDOUT_SHARE))
+    train, test = periods < cutoff, periods >= cutoff
+    residuals = np.array([0.0])
+    if train.any() and test.any():
+        with span('model_fit'):
+            holdout_model = _new_model().fit(X[train], y[train])
+        residuals = y[test] - holdout_model.predict(X[test])
+    if len(residuals) > MAX_RESIDUALS:
+        residuals = np.random.default_rng(0).choice(residuals, MAX_RESIDUALS, replace=False)
+
+    # Forecast with everything, including the held-out periods
+    with span('model_fit'):
+        model = _new_model().fit(X, y)
+
+    return {
+        "model": model,
+        "key": key,
+        "features": FEATURES,
+        "series": series,
+        "history": totals[:, -LAGS:],
+        "next_period": starts[-1] + pd.Timedelta(days=PERIOD_DAYS),
+        "residuals": np.sort(residuals),
+        "metrics": {
+            "series": int(len(series)),
+            "train_rows": int(len(y)),
+            "holdout_rows": int(test.sum()),
+            "holdout_mae": float(np.abs(residuals).mean()),
+        },
+    }
+
+
+@timed('predict')
+def forecast_horizon(bundle, periods=6, level=0.8, series=None):
+    """Forecast `periods` biweekly steps for the requested series (default: all).
+
+    Returns (series ids, period start dates, predicted, lower, upper); the
+    arrays are [series x periods]. Unknown ids are left out.
+    """
+    ids = bundle['series']
+    if series is not None:
+        rows = np.flatnonzero(np.isin(ids, np.asarray(series, dtype=str)))
+    else:
+        rows = np.arange(len(ids))
+    # Most recent first, as lag_features() expects
+    lags = bundle['history'][rows, ::-1].astype(float)
+    dates = bundle['next_period'] + pd.to_timedelta(np.arange(periods) * PERIOD_DAYS, unit='D')
+
+    predicted = np.empty((len(rows), periods))
+    for step in range(periods if len(rows) else 0):
+        X = lag_features(lags, dates[step].month, dates[step].quarter)
+        predicted[:, step] = bundle['model'].predict(X)
+        lags = np.column_stack([predicted[:, step], lags[:, :LAGS - 1]])
+
+    low_q, high_q = np.quantile(bundle['residuals'], [(1 - level) / 2, (1 + level) / 2])
+    widen = np.sqrt(np.arange(1, periods + 1))
+    return ids[rows], dates, predicted, predicted + low_q * widen, predicted + high_q * widen
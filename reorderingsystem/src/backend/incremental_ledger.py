@@ -0,0 +1,276 @@
+"""Append-aware view of the movement ledger export.
+
+SAP appends new postings to the end of the export, so after the first full
+load IncrementalLedger remembers the byte offset it has consumed. A refresh
+then parses only the new tail and folds it into the running aggregates.
+Tails are kept aside and merged into the frame the first time it is read
+(or once MAX_PENDING_TAILS have piled up). A merge copies the whole frame,
+so endpoints served from the aggregates never pay for it, and a burst of
+appends pays for it once. Categorical columns keep their codes and get the
+tail's new values appended to their categories.
+
+The ledger is reloaded in full when the file shrank, or when the first or
+the last GUARD_BYTES of the consumed part changed, i.e. the export was
+regenerated rather than appended to. Edits only in the middle of the
+consumed part, that keep the file's size, are not detected.
+
+With `columns`, only that projection of the export is kept in memory, for
+the full load and for every appended tail alike.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from demand_model import DAILY_AGGREGATIONS
+from instrumentation import span
+from ledger_snapshot import clean_frame, load_ledger
+
+# Bytes at the start of the file and just before the consumed offset that must be unchanged for an append
+GUARD_BYTES = 4096
+# Appended tails kept aside before they are merged into the frame, when nobody reads it
+MAX_PENDING_TAILS = 64
+
+# Resample rule per rollup bucket served to the dashboard
+ROLLUP_FREQUENCIES = {'day': None, 'week': 'W', 'biweek': '2W', 'month': 'MS'}
+
+
+def rollup_daily(daily, bucket='day'):
+    """Resample daily totals to a bucket; float columns plus a formatted 'date' column."""
+    rule = ROLLUP_FREQUENCIES[bucket]
+    frame = daily if rule is None else daily.resample(rule).agg(DAILY_AGGREGATIONS)
+    frame = frame.astype(float)
+    frame['date'] = frame.index.strftime('%Y-%m-%d')
+    return frame
+
+
+def _extend_categorical(head, values):
+    """head followed by values as one categorical, keeping head's categories and codes as they are."""
+    categories = head.cat.categories
+    new = pd.Index(pd.unique(values[pd.notna(values)]))
+    if len(new) and new.dtype != categories.dtype:
+        try:
+            # e.g. object vendor codes in a tail next to the frame's float ones
+            new = new.astype(categories.dtype)
+        except (TypeError, ValueError):
+            pass
+    new = new.difference(categories)
+    if len(new):
+        categories = categories.append(new)
+    codes = np.concatenate([head.cat.codes.to_numpy(), categories.get_indexer(values)])
+    return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+
+
+class LedgerAggregates:
+    """Running per-day totals and ledger-wide counters, updated in place.
+
+    Weekly and biweekly rollups are derived from the daily totals on first
+    use after a change, so dashboard reads cost O(days), not O(postings).
+    """
+
+    def __init__(self):
+        self.daily = pd.DataFrame(columns=list(DAILY_AGGREGATIONS), dtype=float,
+                                  index=pd.DatetimeIndex([], name='Posting Date'))
+        self.vendor_counts = Counter()
+        self.active_orders = 0
+        self.amount_sum = 0.0
+        self.amount_count = 0
+        self.rows = 0
+        self.last_stocks = []  # Total stock of the last two postings
+        self.stock_by_material = pd.Series(dtype=float)  # latest Total stock per material id
+        self._rollups = {}
+
+    def update(self, rows):
+        """Fold rows (in posting-date order, after everything seen so far) in."""
+        day = rows.groupby('Posting Date').agg(DAILY_AGGREGATIONS)
+        overlap = day.index.intersection(self.daily.index)
+        if len(overlap):
+            for col, how in DAILY_AGGREGATIONS.items():
+                if how == 'sum':
+                    self.daily.loc[overlap, col] += day.loc[overlap, col]
+                else:
+                    # 'last' skips missing values, so only overwrite where the tail has one
+                    latest = day.loc[overlap, col]
+                    self.daily.loc[latest.dropna().index, col] = latest.dropna()
+        fresh = day.loc[day.index.difference(self.daily.index)]
+        if len(fresh):
+            self.daily = pd.concat([self.daily, fresh]).sort_index() if len(self.daily) else fresh
+
+        vendors = rows['Vendor'].dropna()
+        self.vendor_counts.update(vendors.value_counts().loc[lambda c: c > 0].to_dict())
+        self.active_orders += int(rows['Purchase order'].notna().sum())
+        self.amount_sum += float(rows['Amt.in Loc.Cur.'].sum())
+        self.amount_count += int(rows['Amt.in Loc.Cur.'].count())
+        self.rows += len(rows)
+        self.last_stocks = (self.last_stocks + rows['Total stock'].iloc[-2:].tolist())[-2:]
+        latest = rows.groupby(rows['Material'].astype(str))['Total stock'].last()
+        self.stock_by_material = (latest.combine_first(self.stock_by_material)
+                                  if len(self.stock_by_material) else latest)
+        self._rollups = {}
+
+    def rollup(self, bucket='day'):
+        """Ledger-wide totals per bucket (see rollup_daily), cached until the next update."""
+        cached = self._rollups.get(bucket)
+        if cached is None:
+            self._rollups[bucket] = cached = rollup_daily(self.daily, bucket)
+        return cached
+
+    def kpis(self):
+        # An export with no postings yet (only its header) has no stock figures
+        current_stock = float(self.last_stocks[-1]) if self.last_stocks else None
+        prev_stock = self.last_stocks[0] if self.last_stocks else 0
+        return {
+            "currentStock": current_stock,
+            "stockChange": float((current_stock - prev_stock) / prev_stock * 100) if prev_stock != 0 else 0.0,
+            "activeOrders": self.active_orders,
+            "totalVendors": len(self.vendor_counts),
+            "averageOrderValue": self.amount_sum / self.amount_count if self.amount_count else float('nan')
+        }
+
+
+class IncrementalLedger:
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+        self._frame = None
+        self._pending = []  # parsed tails not merged into _frame yet
+        self.aggregates = LedgerAggregates()
+        self.offset = 0
+        self.full_loads = 0
+        self.tail_loads = 0
+        self._columns = None
+        self._guard = None
+        self._material_rollups = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Bring the ledger up to date with the file. Returns the number of new rows."""
+        with self._lock:
+            size = os.path.getsize(self.path)
+            self._material_rollups = {}
+            # Column types can't be inferred from a header alone, so the first postings are loaded in full
+            first_postings = not self.aggregates.rows and size > self.offset
+            if self._frame is None or first_postings or size < self.offset or not self._guard_matches():
+                with span('ledger_full_load'):
+                    return self._full_load()
+            if size == self.offset:
+                return 0
+            try:
+                with span('ledger_tail_load'):
+                    return self._append_tail()
+            except Exception:
+                # Anything unexpected in the tail (new columns, mixed types): start over
+                with span('ledger_full_load'):
+                    return self._full_load()
+
+    def _read_guard(self, offset):
+        start = max(0, offset - GUARD_BYTES)
+        with open(self.path, 'rb') as f:
+            head = f.read(min(offset, GUARD_BYTES))
+            f.seek(start)
+            return hashlib.sha1(head + f.read(offset - start)).hexdigest()
+
+    def _guard_matches(self):
+        return self._guard is None or self._read_guard(self.offset) == self._guard
+
+    def _full_load(self):
+        # Retry if the export is being written while we read it
+        for _ in range(3):
+            before = os.stat(self.path)
+            df = load_ledger(self.path, columns=self.columns)
+            after = os.stat(self.path)
+            if (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns):
+                break
+        else:
+            # Keep serving the previous frame rather than a torn read
+            raise RuntimeError(f"{self.path} kept changing while it was being loaded")
+
+        # Exports are usually in date order already; sorting would copy the memory-mapped columns
+        if not df['Posting Date'].is_monotonic_increasing:
+            df = df.sort_values('Posting Date', kind='stable').reset_index(drop=True)
+        self._frame = df
+        self._pending = []
+        self.aggregates = LedgerAggregates()
+        self.aggregates.update(df)
+        # Tails have no header line; they are parsed against the file's own header
+        self._columns = list(pd.read_csv(self.path, nrows=0).columns)
+        self.offset = before.st_size
+        self._guard = self._read_guard(self.offset)
+        self.full_loads += 1
+        return len(df)
+
+    def _append_tail(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            tail = f.read()
+        # Only consume complete lines; a half-written posting waits for the next refresh
+        end = tail.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+        rows = pd.read_csv(io.BytesIO(tail[:end]), names=self._columns, header=None,
+                           usecols=self.columns, thousands=',')
+        rows = clean_frame(rows)[list(self._frame.columns)].sort_values('Posting Date', kind='stable')
+
+        self._pending.append(rows)
+        daily = self.aggregates.daily
+        if len(daily) and rows['Posting Date'].min() < daily.index[-1]:
+            # Back-dated postings: keep the frame ordered and rebuild the day totals
+            self._consolidate()
+            self._frame = self._frame.sort_values('Posting Date', kind='stable').reset_index(drop=True)
+            self.aggregates = LedgerAggregates()
+            self.aggregates.update(self._frame)
+        else:
+            self.aggregates.update(rows)
+            if len(self._pending) >= MAX_PENDING_TAILS:
+                self._consolidate()
+
+        self.offset += end
+        self._guard = self._read_guard(self.offset)
+        self.tail_loads += 1
+        return len(rows)
+
+    def _consolidate(self):
+        """Merge the pending tails into the frame (the caller holds the lock)."""
+        if not self._pending:
+            return
+        head, tails = self._frame, self._pending
+        columns = {}
+        for col in head.columns:
+            if isinstance(head[col].dtype, pd.CategoricalDtype):
+                # Each tail has categories of its own; only the frame's are kept
+                values = np.concatenate([np.asarray(rows[col], dtype=object) for rows in tails])
+                columns[col] = _extend_categorical(head[col], values)
+            else:
+                columns[col] = pd.concat([head[col], *(rows[col] for rows in tails)], ignore_index=True)
+        self._frame = pd.DataFrame(columns)
+        self._pending = []
+
+    @property
+    def frame(self):
+        """The whole ledger, in posting-date order."""
+        if self._pending:
+            with self._lock:
+                self._consolidate()
+        return self._frame
+
+    def rollup(self, bucket='day', material=None):
+        """Totals per bucket for the whole ledger or a single material."""
+        if material is None:
+            return self.aggregates.rollup(bucket)
+        key = (str(material), bucket)
+        cached = self._material_rollups.get(key)
+        if cached is None:
+            rows = self.frame[self.frame['Material'].astype(str) == str(material)]
+            daily = rows.groupby('Posting Date').agg(DAILY_AGGREGATIONS)
+            self._material_rollups[key] = cached = rollup_daily(daily, bucket)
+        return cached
+
+    @property
+    def current_stock(self):
+        # NaN without postings: evaluate_rules() then finds no rule due, rather than zero stock everywhere
+        stocks = self.aggregates.last_stocks
+        return stocks[-1] if stocks else float('nan')
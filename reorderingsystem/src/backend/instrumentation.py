@@ -0,0 +1,185 @@
+"""Timings and counters for the backend hot paths, in Prometheus text format.
+
+span('parse') times a block into stockflow_stage_seconds{stage="parse"}.
+The request middleware in main.py records stockflow_request_seconds per
+route, and the ledger cache and model registry count their hits and misses
+in stockflow_cache_events_total. render() produces the /metrics payload.
+
+Values are per process: with several uvicorn workers each one reports its
+own, and Prometheus should scrape them separately or sum them.
+
+profile_request() is the opt-in profiler. It runs cProfile around one
+request and writes a .prof file that `python -m pstats` or snakeviz can
+open.
+"""
+import cProfile
+import contextvars
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Latency buckets in seconds, from cached lookups up to full model fits
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROFILE_DIR = os.environ.get('STOCKFLOW_PROFILE_DIR', 'profiles')
+
+# True inside profile_request(), so offloaded work can stay on the profiled thread
+profiling = contextvars.ContextVar('profiling', default=False)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    pairs = ','.join(f'{n}="{v}"' for n, v in zip(names, escaped))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def samples(self):
+        names = self.labelnames + ('le',)
+        out = []
+        with self._lock:
+            for labels, series in self._values.items():
+                for bound, count in zip(self.buckets, series):
+                    out.append((f'{self.name}_bucket', names, labels + (repr(bound),), count))
+                out.append((f'{self.name}_bucket', names, labels + ('+Inf',), series[-1]))
+                out.append((f'{self.name}_sum', self.labelnames, labels, series[-2]))
+                out.append((f'{self.name}_count', self.labelnames, labels, series[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, collect, labelnames=()):
+        """Register a gauge read at scrape time; collect() returns [(label values, value)]."""
+        self._gauges.append((name, help, tuple(labelnames), collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labelnames, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labelnames, labels)} {value}')
+        for name, help, labelnames, collect in self._gauges:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in collect():
+                lines.append(f'{name}{_format_labels(labelnames, labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'stockflow_stage_seconds', 'Time spent in each pipeline stage.', ['stage'])
+REQUEST_SECONDS = registry.histogram(
+    'stockflow_request_seconds', 'HTTP request latency by route.', ['method', 'route', 'status'])
+CACHE_EVENTS = registry.counter(
+    'stockflow_cache_events_total', 'Cache lookups by cache and outcome.', ['cache', 'result'])
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+render = registry.render
+
+# cProfile allows a single active profiler per process
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profile_request(label):
+    """Profile the enclosed block into PROFILE_DIR; yields the .prof path, or None if busy."""
+    if not _profile_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-') or 'root'
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}.prof")
+        profiler = cProfile.Profile()
+        token = profiling.set(True)
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiling.reset(token)
+            profiler.dump_stats(path)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from instrumentation import CACHE_EVENTS
+
+
+class LedgerCache:
+    """Process-wide cache of parsed ledger files.
+
+    Entries are keyed by file path and invalidated by modification time, the
+    same signal the alert store uses to skip unchanged ledgers. Concurrent
+    callers asking for the same file version share a single parse
+    (single-flight), and the least recently used file is evicted once
+    max_entries is exceeded.
+
+    If a refresh callable is given, a stale entry is handed to
+    refresh(path, old_value) instead of being parsed again from scratch.
+    Lookups are counted in CACHE_EVENTS under `label`.
+    """
+
+    def __init__(self, max_entries=4, label='ledger'):
+        self.max_entries = max_entries
+        self.label = label
+        self._entries = OrderedDict()  # path -> (mtime, value)
+        self._loading = {}  # (path, mtime) -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, loader, refresh=None):
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        key = (path, mtime)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                CACHE_EVENTS.inc(self.label, 'hit')
+                return entry[1]
+            stale = entry[1] if entry is not None else None
+            pending = self._loading.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._loading[key] = pending
+                self.misses += 1
+
+        # Another request is already parsing this version; wait for its result
+        if not leader:
+            CACHE_EVENTS.inc(self.label, 'shared')
+            return pending.result()
+        CACHE_EVENTS.inc(self.label, 'miss' if stale is None else 'stale')
+
+        try:
+            if refresh is not None and stale is not None:
+                value = refresh(path, stale)
+            else:
+                value = loader(path)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            current = self._entries.get(path)
+            # Don't let a slow parse of an older version overwrite a newer one
+            if current is None or current[0] <= mtime:
+                self._entries[path] = (mtime, value)
+                self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        pending.set_result(value)
+        return value
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def ledger_fingerprint(path):
+    """Short identifier of a ledger file version (path, size and mtime)."""
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+ledger_cache = LedgerCache()
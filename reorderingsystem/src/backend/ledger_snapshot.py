@@ -0,0 +1,181 @@
+"""Columnar snapshots of the SAP ledger exports.
+
+The raw exports (1111003.csv movements, 4999122.csv MRP list) carry
+thousands separators and currency symbols that every loader used to strip
+with str.replace. ingest() does that cleaning once and writes an
+uncompressed Arrow IPC file next to the CSV, with dates parsed, quantities
+numeric and text columns dictionary-encoded. load_ledger() memory-maps the
+snapshot and rebuilds it automatically when the CSV changes, in one worker
+at a time (workers.file_lock on <snapshot>.lock).
+
+Low-cardinality code columns (plant, storage location, movement type,
+vendor) are categorical even when SAP exports them as numbers, and integer
+quantities are downcast to int32 when they fit. Callers that need only a
+few columns pass one of the PROJECTIONS, so the unused columns are never
+read from the snapshot (or parsed from the CSV).
+
+Usage: python ledger_snapshot.py 1111003.csv 4999122.csv
+"""
+import os
+import sys
+
+import pandas as pd
+
+from instrumentation import span
+from workers import file_lock
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are optional; fall back to parsing the CSV
+    pa = None
+    feather = None
+
+SNAPSHOT_SUFFIX = '.arrow'
+
+# Column typing per export, detected from the header
+SCHEMAS = {
+    'movements': {
+        'marker': 'Posting Date',
+        'dates': ['Posting Date', 'Document Date'],
+        'numeric': ['Order Qty', 'Total stock'],
+        'currency': ['Amt.in Loc.Cur.'],
+        'categorical': ['Plant', 'Storage location', 'Movement type', 'Vendor'],
+    },
+    'mrp': {
+        'marker': 'Planned dates',
+        'dates': ['Planned dates', 'Rescheduling date'],
+        'numeric': ['Rec./reqd qty', 'Avail. Quantity', 'Rec P. Qty'],
+        'currency': [],
+        'categorical': ['MRP element', 'Plng Plant', 'Stor. Loc.'],
+    },
+}
+
+# Bump when clean_frame() or the file layout changes, so old snapshots are rebuilt
+SNAPSHOT_VERSION = b'3'
+
+# Columns each consumer of the movement ledger actually reads
+PROJECTIONS = {
+    # Dashboard endpoints: running aggregates, rollups and /analysis
+    'dashboard': ['Material', 'Storage location', 'Movement type', 'Movement Type Text',
+                  'Material Document', 'Posting Date', 'Order Qty', 'Amt.in Loc.Cur.', 'Vendor',
+                  'Purchase order', 'Total stock'],
+    # /forecast regression
+    'forecast': ['Movement type', 'Posting Date', 'Order Qty', 'Amt.in Loc.Cur.', 'Total stock'],
+    # Per-SKU biweekly models (batch_forecast.py)
+    'series': ['Material', 'Plant', 'Posting Date', 'Order Qty', 'Amt.in Loc.Cur.', 'Total stock'],
+}
+
+INT32_RANGE = (-2**31, 2**31 - 1)
+
+
+def snapshot_path(csv_path):
+    return os.path.splitext(csv_path)[0] + SNAPSHOT_SUFFIX
+
+
+def detect_schema(columns):
+    for name, schema in SCHEMAS.items():
+        if schema['marker'] in columns:
+            return name
+    return None
+
+
+def _to_number(series, pattern):
+    if series.dtype == 'object':
+        series = series.astype(str).str.replace(pattern, '', regex=True)
+    return pd.to_numeric(series, errors='coerce')
+
+
+def parse_csv(csv_path, columns=None):
+    with span('csv_parse'):
+        df = clean_frame(pd.read_csv(csv_path, usecols=columns, thousands=','))
+        return df[columns] if columns is not None else df
+
+
+def clean_frame(df):
+    """Apply the export's column typing to a raw frame read with thousands=','."""
+    schema = SCHEMAS.get(detect_schema(df.columns))
+    if schema is not None:
+        for col in schema['dates']:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+        for col in schema['numeric']:
+            if col in df.columns:
+                df[col] = _to_number(df[col], r',')
+        for col in schema['currency']:
+            if col in df.columns:
+                df[col] = _to_number(df[col], r'[^\d.-]')
+        for col in schema['categorical']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+    # Dictionary-encode the remaining text columns (user, descriptions...)
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].astype('category')
+        elif df[col].dtype == 'int64' and len(df[col]):
+            lo, hi = df[col].min(), df[col].max()
+            if INT32_RANGE[0] <= lo and hi <= INT32_RANGE[1]:
+                df[col] = df[col].astype('int32')
+    return df
+
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return {b'source_size': str(st.st_size).encode(), b'source_mtime_ns': str(st.st_mtime_ns).encode(),
+            b'snapshot_version': SNAPSHOT_VERSION}
+
+
+def ingest(csv_path, out_path=None):
+    """Parse csv_path once and write its typed snapshot. Returns the snapshot path."""
+    if pa is None:
+        raise RuntimeError("pyarrow is required to write ledger snapshots")
+    out_path = out_path or snapshot_path(csv_path)
+    signature = _source_signature(csv_path)
+    table = pa.Table.from_pandas(parse_csv(csv_path), preserve_index=False).combine_chunks()
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **signature})
+
+    # Write to a temp file and rename so readers never see a partial snapshot.
+    # One record batch: pandas can only wrap a column without copying it if it isn't split in chunks.
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(len(table), 1))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def is_fresh(csv_path, snap_path=None):
+    snap_path = snap_path or snapshot_path(csv_path)
+    if pa is None or not os.path.exists(snap_path):
+        return False
+    try:
+        # Only the schema footer is read here, not the column data
+        with pa.memory_map(snap_path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    signature = _source_signature(csv_path)
+    return all(metadata.get(k) == v for k, v in signature.items())
+
+
+def load_ledger(csv_path, columns=None):
+    """Load a ledger export as a typed DataFrame, via its snapshot when possible."""
+    if pa is None:
+        return parse_csv(csv_path, columns)
+
+    snap_path = snapshot_path(csv_path)
+    if not is_fresh(csv_path, snap_path):
+        # One worker rebuilds a stale snapshot; the others wait for it and then read its file
+        with file_lock(f"{snap_path}.lock"):
+            if not is_fresh(csv_path, snap_path):
+                ingest(csv_path, snap_path)
+    # Memory-mapped read: numeric columns without nulls are handed to pandas
+    # without copying, and dictionary columns come back as categoricals. The
+    # pages belong to the OS page cache, so every worker process shares them.
+    with span('snapshot_load'):
+        table = feather.read_table(snap_path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print(f"{path} -> {ingest(path)}")
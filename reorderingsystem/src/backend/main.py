@@ -1,23 +1,39 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_absolute_percentage_error
 import warnings
 warnings.filterwarnings('ignore')
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-import holidays
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.impute import SimpleImputer
-import requests
-import json
+from typing import List, Literal, Optional
+from datetime import date, datetime
+import asyncio
+import copy
+import hashlib
+import logging
 import os
+from ledger_cache import ledger_cache, ledger_fingerprint
+from ledger_snapshot import PROJECTIONS
+from incremental_ledger import IncrementalLedger, ROLLUP_FREQUENCIES
+from downsampling import DOWNSAMPLERS
+from model_registry import model_registry
+from holiday_features import days_to_nearest_holiday
+from notifications import NotificationDispatcher, stub_router
+from order_store import OrderStore
+from alert_store import AlertStore, alert_key
+from reorder_engine import evaluate_rules, material_forecasts
+from shortage import scan_horizons, DEFAULT_HORIZONS
+from demand_model import FEATURES, train_matrix
+from feature_store import feature_store
+from online_models import OnlineLinearRegression, drifted, grow_forest
+from horizon_forecast import train_horizon_model, forecast_horizon, PERIOD_DAYS
+from scheduler import Scheduler
+from workers import LeaderLock, cpu_executor, run_cpu, serve
+from responses import dumps, frame_arrow, frame_json, versioned_response
+from instrumentation import REQUEST_SECONDS, profile_request, registry, render, span, timed
 
 app = FastAPI()
 
@@ -30,6 +46,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
+# ?profile=1 dumps a cProfile of that request; off unless explicitly enabled
+PROFILING_ENABLED = os.environ.get('STOCKFLOW_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    if PROFILING_ENABLED and request.query_params.get('profile'):
+        with profile_request(request.url.path) as profile_path:
+            response = await call_next(request)
+        if profile_path:
+            response.headers['X-Profile'] = profile_path
+    else:
+        response = await call_next(request)
+    # Label by route template so /orders/{order_id}/status is one series
+    route = request.scope.get('route')
+    REQUEST_SECONDS.observe(time.perf_counter() - started, request.method,
+                            route.path if route is not None else 'unmatched', response.status_code)
+    return response
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=render(), media_type="text/plain; version=0.0.4")
+
+# Teams alerts are queued and delivered in the background
+notification_dispatcher = NotificationDispatcher()
+
+if os.environ.get('TEAMS_STUB'):
+    app.include_router(stub_router)
+
+# Periodic reorder/shortage/model jobs; with several workers only the one holding the lock runs them
+SCHEDULER_ENABLED = os.environ.get('STOCKFLOW_SCHEDULER', '').lower() in ('1', 'true', 'yes')
+scheduler_lock = LeaderLock(os.environ.get('STOCKFLOW_SCHEDULER_LOCK', 'scheduler.lock'))
+
+# Load the ledger and models after startup instead of on the first dashboard request
+PREWARM_ENABLED = os.environ.get('STOCKFLOW_PREWARM', '1').lower() in ('1', 'true', 'yes')
+
+# Seconds spent importing this module, starting up and prewarming; reported by /health
+startup_timings = {}
+
+@app.on_event("startup")
+async def start_background_services():
+    started = time.perf_counter()
+    await notification_dispatcher.start()
+    if SCHEDULER_ENABLED and scheduler_lock.acquire():
+        logger.info("Running the scheduler in worker %d", os.getpid())
+        await scheduler.start()
+    if PREWARM_ENABLED:
+        # Not awaited: the worker takes requests while the caches fill
+        asyncio.get_running_loop().run_in_executor(cpu_executor, prewarm)
+    startup_timings['startup'] = time.perf_counter() - started
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await scheduler.stop()
+    scheduler_lock.release()
+    await notification_dispatcher.stop()
+    # Incremental model updates not written yet, so a restart picks up from them
+    await run_cpu(model_registry.flush)
+
 # Pydantic models
 class ReorderRule(BaseModel):
     material_id: str
@@ -49,30 +126,32 @@ class Order(BaseModel):
     expected_delivery: datetime
 
 # Storage
-reorder_rules: List[ReorderRule] = []
-orders: List[Order] = []
+order_store = OrderStore()
+alert_store = AlertStore()
+
+LEDGER_PATH = '1111003.csv'
+
+def _load_ledger(path: str) -> IncrementalLedger:
+    # The long-lived frame keeps only the columns the dashboard endpoints read
+    ledger = IncrementalLedger(path, columns=PROJECTIONS['dashboard'])
+    ledger.refresh()
+    return ledger
 
-def prepare_data() -> pd.DataFrame:
+def _refresh_ledger(path: str, ledger: IncrementalLedger) -> IncrementalLedger:
+    # Appended postings are parsed on their own; a rewritten export reloads in full
+    ledger.refresh()
+    return ledger
+
+def get_ledger(path: str = LEDGER_PATH) -> IncrementalLedger:
+    return ledger_cache.get(path, _load_ledger, refresh=_refresh_ledger)
+
+def prepare_data(path: str = LEDGER_PATH) -> pd.DataFrame:
     try:
-        df = pd.read_csv('1111003.csv')
-        
-        # Convert date columns to datetime
-        date_columns = ['Posting Date', 'Document Date']
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-        
-        # Convert Order Qty to numeric, handling any non-numeric values
-        df['Order Qty'] = pd.to_numeric(df['Order Qty'], errors='coerce')
-        
-        # Convert amount to numeric, removing currency symbols if present
-        df['Amt.in Loc.Cur.'] = pd.to_numeric(df['Amt.in Loc.Cur.'].str.replace(r'[^\d.-]', '', regex=True), errors='coerce')
-        
-        # Sort by posting date
-        df = df.sort_values('Posting Date')
-        
-        return df
+        # Parsed frames are shared across requests until the file changes.
+        # Hand out a shallow copy so endpoints adding columns don't touch the cache.
+        return get_ledger(path).frame.copy(deep=False)
     except Exception as e:
-        print(f"Error preparing data: {str(e)}")
+        logger.exception("Error preparing data")
         raise HTTPException(status_code=500, detail=f"Error preparing data: {str(e)}")
 # Alert Model
 class Alert(BaseModel):
@@ -81,433 +160,591 @@ class Alert(BaseModel):
     title: str
     description: str
     timestamp: datetime
+    material_id: Optional[str] = None
+    horizon_days: Optional[int] = None
  
-# State Manager
-class AlertStateManager:
-    def __init__(self, state_file='alert_state.json'):
-        self.state_file = state_file
-    def get_last_state(self):
-        if not os.path.exists(self.state_file):
-            return None
-        try:
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
-        except:
-            return None
-    def save_state(self, data, sample_date, file_modified_time):
-        state = {
-            'last_alert_data': data,
-            'last_sample_date': sample_date.strftime('%Y-%m-%d'),
-            'last_file_modified': file_modified_time,
-            'last_check_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f)
- 
-def send_teams_notification(recipients, message):
-    teams_link = ""
-    payload = {
-        "Recipients": recipients,
-        "Message": message
-    }
-    headers = {
-        "Content-Type": "application/json"
-    }
-    try:
-        response = requests.post(
-            teams_link, 
-            data=json.dumps(payload), 
-            headers=headers
-        )
-        if response.status_code == 200:
-            print("Teams notification sent successfully!")
-        else:
-            print(f"Failed to send Teams notification. Status: {response.status_code}")
-            print(response.text)
-    except Exception as e:
-        print(f"Error sending Teams notification: {str(e)}")
+ALERT_HORIZON_DAYS = 14
+# The movement export covers one material; its file name is the material number
+ALERT_MATERIAL = os.path.splitext(os.path.basename(LEDGER_PATH))[0]
+ALERT_RECIPIENTS = "example@example.com"  # Replace with actual recipients
+
+def shortage_message(difference: float, end_date: pd.Timestamp) -> str:
+    return (
+        f"🚨 Butter Breakdown Alert! 🚨\n"
+        f"We're about {difference:.2f} kg short of buttery bliss! 😱\n\n"
+        f"In just two weeks ({end_date.date()}), we'll be stuck spreading *regret* on our toast instead of butter 🧈. "
+        "The ovens are roaring (metaphorically—don't call the fire department 🔥), but our butter stash is toast! 😬\n\n"
+        "No butter means we'll be whipping up… *sandpaper croissants* 🥐, *cardboard cookies* 🍪, and *scones so dry "
+        "they double as hockey pucks*. 🏒 Not a good look for us.\n\n"
+        "Our production line might screech to a halt like someone stepping on a stick of butter barefoot. 🏭💥 "
+        "And the only thing worse than a butter-less bakery is… well, *nothing*. 😅\n\n"
+        "This message is brought to you by the urgent need for butter—because without it, we can't churn out the magic. 🧙‍♂️✨\n"
+        "Help us out before we become a butter-less bakery! 🧈😂"
+    )
+
+def evaluate_alerts():
+    file_path = LEDGER_PATH
+    # Set sample date
+    sample_date = pd.to_datetime('2024-11-15')
+    # The same file version and sample date always give the same alerts; any worker may have recorded them
+    version = f"{os.path.getmtime(file_path)}:{sample_date.strftime('%Y-%m-%d')}"
+    recorded = alert_store.evaluation(file_path, version)
+    if recorded is not None:
+        return {"alerts": recorded}
  
+    # Stream the ledger once for every horizon, reading only the two columns needed
+    with span('shortage_scan'):
+        projections = scan_horizons(file_path, 'Posting Date', ['Order Qty'], sample_date,
+                                    horizons=DEFAULT_HORIZONS, positive_only=True)
+    projection = projections[projections['horizon_days'] == ALERT_HORIZON_DAYS].iloc[0]
+    end_date = projection['end_date']
+    total_required = projection['Order Qty']
+    alerts, messages = [], {}
+    # If there's a shortage, create alert and queue a Teams notification
+    if total_required > 0:
+        difference = total_required/200  # Convert to kg
+        alert = Alert(
+            id=1,
+            type="critical",
+            title="🚨 Butter Shortage Alert",
+            description=f"Projected shortage of {difference:.2f} kg by {end_date.date()}",
+            timestamp=datetime.now(),
+            material_id=ALERT_MATERIAL,
+            horizon_days=ALERT_HORIZON_DAYS
+        ).dict()
+        alert['timestamp'] = alert['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
+        alerts.append(alert)
+        messages[alert_key(alert)] = shortage_message(difference, end_date)
+    
+    # Only alerts that changed, or were last sent before the dedup window, are due
+    for alert in alert_store.record(file_path, version, alerts):
+        notification_dispatcher.notify(ALERT_RECIPIENTS, messages[alert_key(alert)])
+    return {"alerts": alerts}
+
 @app.get("/api/inventory/check-alerts")
 async def check_alerts():
+    # The scheduler keeps this fresh in the background; only compute inline before its first run
+    latest = scheduler.latest('shortage-check')
+    if latest is not None:
+        return latest
     try:
-        file_path = "1111003.csv"
-        state_manager = AlertStateManager()
-        # Get file's last modified time
-        file_modified_time = os.path.getmtime(file_path)
-        # Get last state
-        last_state = state_manager.get_last_state()
-        # Set sample date
-        sample_date = pd.to_datetime('2024-11-15')
-        # Check if we need to process
-        should_process = True
-        if last_state:
-            same_file_time = last_state['last_file_modified'] == file_modified_time
-            same_sample_date = last_state['last_sample_date'] == sample_date.strftime('%Y-%m-%d')
-            if same_file_time and same_sample_date:
-                should_process = False
-                # Return cached alerts if they exist
-                if 'last_alert_data' in last_state:
-                    return {"alerts": [last_state['last_alert_data']]}
- 
-        # Load the CSV file
-        df = pd.read_csv(file_path)
-        # Keep only required columns
-        df = df[['Order Qty', 'Posting Date']]
-        # Convert date and numeric columns
-        df['Posting Date'] = pd.to_datetime(df['Posting Date'])
-        # Handle Order Qty conversion
-        if df['Order Qty'].dtype == 'object':
-            df['Order Qty'] = df['Order Qty'].replace(',', '', regex=True).astype(float)
-        else:
-            df['Order Qty'] = df['Order Qty'].astype(float)
-        # Calculate end date
-        end_date = sample_date + timedelta(days=14)
-        # Filter data
-        mask = (df['Posting Date'] <= end_date) & (df['Order Qty'] > 0)
-        filtered_data = df[mask]
-        # Calculate total
-        total_required = filtered_data['Order Qty'].sum()
-        alerts = []
-        # If there's a shortage, create alert and send Teams notification
-        if total_required > 0:
-            difference = total_required/200  # Convert to kg
-            # Create alert data
-            alert_data = {
-                "id": 1,
-                "type": "critical",
-                "title": "🚨 Butter Shortage Alert",
-                "description": f"Projected shortage of {difference:.2f} kg by {end_date.date()}",
-                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            # Only send Teams message if data changed
-            if not last_state or last_state['last_alert_data'] != alert_data:
-                teams_message = (
-                    f"🚨 Butter Breakdown Alert! 🚨\n"
-                    f"We're about {difference:.2f} kg short of buttery bliss! 😱\n\n"
-                    f"In just two weeks ({end_date.date()}), we'll be stuck spreading *regret* on our toast instead of butter 🧈. "
-                    "The ovens are roaring (metaphorically—don't call the fire department 🔥), but our butter stash is toast! 😬\n\n"
-                    "No butter means we'll be whipping up… *sandpaper croissants* 🥐, *cardboard cookies* 🍪, and *scones so dry "
-                    "they double as hockey pucks*. 🏒 Not a good look for us.\n\n"
-                    "Our production line might screech to a halt like someone stepping on a stick of butter barefoot. 🏭💥 "
-                    "And the only thing worse than a butter-less bakery is… well, *nothing*. 😅\n\n"
-                    "This message is brought to you by the urgent need for butter—because without it, we can't churn out the magic. 🧙‍♂️✨\n"
-                    "Help us out before we become a butter-less bakery! 🧈😂"
-                )
-                recipients = "example@example.com"  # Replace with actual recipients
-                send_teams_notification(recipients, teams_message)
-                # Save the new state
-                state_manager.save_state(alert_data, sample_date, file_modified_time)
-            # Create alert for frontend
-            alerts.append(Alert(
-                id=1,
-                type="critical",
-                title="🚨 Butter Shortage Alert",
-                description=f"Projected shortage of {difference:.2f} kg by {end_date.date()}",
-                timestamp=datetime.now()
-            ))
-        return {"alerts": [alert.dict() for alert in alerts]}
+        return await run_cpu(evaluate_alerts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-def create_features(df):
-    df = df.copy()
-    
-    # Group by posting date and calculate daily metrics
-    daily_data = df.groupby('Posting Date').agg({
-        'Order Qty': 'sum',
-        'Total stock': 'last',
-        'Amt.in Loc.Cur.': 'sum'
-    }).reset_index()
-    
-    # Create time-based features
-    daily_data['month'] = daily_data['Posting Date'].dt.month
-    daily_data['quarter'] = daily_data['Posting Date'].dt.quarter
-    daily_data['year'] = daily_data['Posting Date'].dt.year
-    
-    # Resample to biweekly frequency
-    biweekly = daily_data.set_index('Posting Date').resample('2W').agg({
-        'Order Qty': 'sum',
-        'Total stock': 'last',
-        'Amt.in Loc.Cur.': 'sum',
-        'month': 'first',
-        'quarter': 'first',
-        'year': 'first'
-    }).reset_index()
-    
-    # Calculate rolling statistics
-    biweekly['rolling_mean'] = biweekly['Order Qty'].rolling(window=2, min_periods=1).mean()
-    biweekly['rolling_std'] = biweekly['Order Qty'].rolling(window=2, min_periods=1).std()
-    biweekly['pct_change'] = biweekly['Order Qty'].pct_change()
+
+@app.get("/api/inventory/alerts")
+async def get_active_alerts(material_id: Optional[str] = None):
+    # Alerts the latest evaluation raised and that haven't cleared since, whether or not they were re-sent
+    return alert_store.active_alerts(material_id)
+
+# Latest biweekly periods the extra trees of an incremental update are fitted on
+RECENT_PERIODS = 12
+
+def train_reorder_model(table):
+    from sklearn.metrics import mean_absolute_percentage_error
     
-    # Fill missing values
-    biweekly = biweekly.fillna(method='bfill').fillna(method='ffill')
-    return biweekly
-
-def train_model(df):
-    feature_columns = ['month', 'quarter', 'rolling_mean', 'rolling_std', 'pct_change']
-    for i in range(1, 4):
-        df[f'lag_{i}'] = df['Order Qty'].shift(i)
-    df = df.dropna()
+    X, y, periods = table.matrix()
+    model, train_size = train_matrix(X, y)
+    # The latest period's row is the one inference reads
+    forecast = model.predict(X[-1:])[0]
+    metrics = {"estimator": type(model).__name__, "train_periods": int(train_size), "forecast": float(forecast)}
+    baseline_mae = None
+    if train_size < len(y):
+        test_pred = model.predict(X[train_size:])
+        metrics["mape"] = float(mean_absolute_percentage_error(y[train_size:], test_pred))
+        baseline_mae = float(np.abs(y[train_size:] - test_pred).mean())
+    last_period = pd.Timestamp(periods[-1])
+    return {"model": model, "features": list(FEATURES), "forecast": float(forecast), "metrics": metrics,
+            "baseline_mae": baseline_mae, "trained_through": last_period, "updated_through": last_period}
+
+def update_reorder_model(bundle, table):
+    """Warm-start the forest with periods added since `bundle`; None if a full refit is needed."""
+    if 'trained_through' not in bundle:
+        return None
+    X, y, periods = table.matrix()
     
-    train_size = int(len(df) * 0.8)
-    train_data = df[:train_size]
-    test_data = df[train_size:]
+    # Error on every period since the last full fit, including the still-open one
+    since_fit = periods >= np.datetime64(bundle['trained_through'])
+    if drifted(y[since_fit] - bundle['model'].predict(X[since_fit]), bundle['baseline_mae']):
+        return None
     
-    all_features = feature_columns + [col for col in df.columns if col.startswith('lag_')]
-    X_train = train_data[all_features]
-    y_train = train_data['Order Qty']
+    model = bundle['model']
+    last_period = pd.Timestamp(periods[-1])
+    if last_period > bundle['updated_through']:
+        # A new period opened: add trees fitted on the recent periods (other estimators are refit)
+        model = copy.deepcopy(model)
+        if not grow_forest(model, X[-RECENT_PERIODS:], y[-RECENT_PERIODS:]):
+            return None
     
-    model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
-    model.fit(X_train, y_train)
-    return model, all_features, test_data
+    forecast = model.predict(X[-1:])[0]
+    metrics = {**bundle['metrics'], "forecast": float(forecast),
+               "incremental_updates": bundle['metrics'].get('incremental_updates', 0) + 1}
+    if hasattr(model, 'estimators_'):
+        metrics["trees"] = len(model.estimators_)
+    return {**bundle, "model": model, "forecast": float(forecast), "metrics": metrics,
+            "updated_through": last_period}
 
-def generate_forecast(df, model, features, periods=6):
-    last_data = df.iloc[-len(features):].copy()
-    forecast = model.predict(last_data[features].tail(1))
-    return forecast[0]
+def reorder_bundle(ledger: IncrementalLedger, retrain: bool = False) -> dict:
+    # Ledger-wide biweekly features, extended from the previous ledger version when only new postings arrived
+    fingerprint = ledger_fingerprint(LEDGER_PATH)
+    features = lambda: feature_store.get(ledger.frame, fingerprint)
+    return model_registry.get('reorder', fingerprint, lambda: train_reorder_model(features()), force=retrain,
+                              update_fn=lambda previous: update_reorder_model(previous, features()))
+
+def _data_version() -> str:
+    return ledger_fingerprint(LEDGER_PATH)
+
+def _model_version(bundle: dict) -> str:
+    # Changes when a forced retrain or an incremental update changes the model's results
+    return hashlib.sha1(dumps(bundle['metrics'])).hexdigest()[:12]
 
 @app.get("/api/inventory/summary")
-async def get_inventory_summary():
+async def get_inventory_summary(request: Request):
     try:
-        df = prepare_data()
-        current_stock = df['Total stock'].iloc[-1]
-        prev_stock = df['Total stock'].iloc[-2]
-        stock_change = ((current_stock - prev_stock) / prev_stock * 100) if prev_stock != 0 else 0
-        
-        # Count active purchase orders
-        active_orders = len(df[df['Purchase order'].notna()])
-        
-        # Count distinct vendors
-        total_vendors = df['Vendor'].nunique()
-        
-        # Calculate average order value
-        avg_order_value = df['Amt.in Loc.Cur.'].mean()
-        
-        return {
-            "currentStock": float(current_stock),
-            "stockChange": float(stock_change),
-            "activeOrders": int(active_orders),
-            "totalVendors": int(total_vendors),
-            "averageOrderValue": float(avg_order_value)
-        }
+        # Stock, purchase-order, vendor and amount totals are maintained as the ledger is ingested
+        return await run_cpu(versioned_response, request, _data_version(),
+                             lambda fmt: dumps(get_ledger().aggregates.kpis()))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# 'day', 'week', ...: an unknown bucket gets a 422 like any other invalid parameter
+RollupBucket = Literal[tuple(ROLLUP_FREQUENCIES)]
+
 @app.get("/api/inventory/chart-data")
-async def get_chart_data():
+async def get_chart_data(request: Request, start: Optional[date] = None, end: Optional[date] = None,
+                         material: Optional[str] = None, bucket: RollupBucket = 'day',
+                         points: Optional[int] = Query(None, ge=4),
+                         method: Literal['lttb', 'minmax'] = 'lttb'):
+    def render(fmt):
+        data = get_ledger().rollup(bucket, material)
+        # The rollup index is sorted, so the date range is two binary searches
+        lo = data.index.searchsorted(pd.Timestamp(start)) if start else 0
+        hi = data.index.searchsorted(pd.Timestamp(end), side='right') if end else len(data)
+        chart_data = data.iloc[lo:hi].rename(columns={'Total stock': 'stock', 'Order Qty': 'required'})
+        
+        # Reduce to roughly `points` rows, picked on the stock line
+        if points and len(chart_data) > points:
+            x = chart_data.index.asi8
+            keep = DOWNSAMPLERS[method](x, chart_data['stock'].to_numpy(), points)
+            chart_data = chart_data.iloc[keep]
+        
+        # Serialize straight from the column arrays instead of building a dict per day
+        chart_data = chart_data[['date', 'stock', 'required']]
+        return frame_arrow(chart_data) if fmt == 'arrow' else frame_json(chart_data)
+    
     try:
-        df = prepare_data()
-        # Filter for dates in 2024 only
-        df['Posting Date'] = pd.to_datetime(df['Posting Date'])
-        df = df[df['Posting Date'].dt.year >= 2024]
-        
-        chart_data = df.groupby('Posting Date').agg({
-            'Total stock': 'last',
-            'Order Qty': 'sum'
-        }).reset_index()
-        
-        result = []
-        for index, row in chart_data.iterrows():
-            result.append({
-                "date": row['Posting Date'].strftime('%Y-%m-%d'),  # This is now a datetime object, not a Series
-                "stock": float(row['Total stock']),
-                "required": float(row['Order Qty'])
-            })
-        return result
+        return await run_cpu(versioned_response, request, _data_version(), render)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in get_chart_data: {str(e)}")  # Add this for debugging
+        logger.exception("Error in get_chart_data")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _nested(frame: pd.DataFrame) -> dict:
+    # {column: {stat: {row: value}}} for frames with (column, stat) MultiIndex columns
+    result = {}
+    for (column, stat), values in frame.items():
+        result.setdefault(column, {})[stat] = {str(k): v for k, v in values.items()}
+    return result
+
 @app.get("/api/inventory/analysis")
-async def get_inventory_analysis():
-    try:
+async def get_inventory_analysis(request: Request):
+    def render(fmt):
         df = prepare_data()
         
         # Storage location analysis
-        location_analysis = df.groupby('Storage location').agg({
+        location_analysis = df.groupby('Storage location', observed=True).agg({
             'Order Qty': ['count', 'sum', 'mean'],
             'Amt.in Loc.Cur.': ['sum', 'mean']
         }).round(2)
         
         # Movement type analysis
-        movement_analysis = df.groupby(['Movement type', 'Movement Type Text']).size().to_dict()
+        movement_analysis = df.groupby(['Movement type', 'Movement Type Text'], observed=True).size().to_dict()
         
         # Vendor analysis
-        vendor_analysis = df.groupby('Vendor').agg({
+        vendor_analysis = df.groupby('Vendor', observed=True).agg({
             'Order Qty': 'sum',
             'Amt.in Loc.Cur.': 'sum'
-        }).sort_values('Amt.in Loc.Cur.', ascending=False).head(5).to_dict()
+        }).sort_values('Amt.in Loc.Cur.', ascending=False).head(5)
         
         # Weekly patterns
-        df['Week'] = df['Posting Date'].dt.isocalendar().week
-        weekly_patterns = df.groupby('Week')['Order Qty'].sum().to_dict()
+        weekly_patterns = df.groupby(df['Posting Date'].dt.isocalendar().week)['Order Qty'].sum()
         
-        return {
-            "locationAnalysis": location_analysis.to_dict(),
+        return dumps({
+            "locationAnalysis": _nested(location_analysis),
             "movementAnalysis": {str(k): int(v) for k, v in movement_analysis.items()},
-            "vendorAnalysis": vendor_analysis,
+            "vendorAnalysis": {col: {str(k): v for k, v in values.items()} for col, values in vendor_analysis.items()},
             "weeklyPatterns": {str(k): float(v) for k, v in weekly_patterns.items()}
-        }
+        })
+    
+    try:
+        return await run_cpu(versioned_response, request, _data_version(), render)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@timed('feature_build')
+def build_forecast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    
+    # Signed offset to the nearest US/Canadian holiday within 15 days
+    df['Days to Nearest Holiday'] = days_to_nearest_holiday(df['Posting Date'])
+    
+    # Drop unnecessary columns and prepare data
+    df = df.drop(columns=['Material', 'Material description', 'Plant', 'Storage location', 'Base Unit of Measure', 
+                        'Movement Type Text', 'User Name', 'Material Document', 'Document Date', 'Vendor', 
+                        'Purchase order', 'Reason for Movement'], axis=1, errors='ignore')
+    df['Year'] = df['Posting Date'].dt.year
+    return df
+
+# Dates used for training; rows from TEST_YEAR are the back-test shown on the dashboard
+TEST_YEAR = 2024
+
+def _forecast_features(df: pd.DataFrame, enc: 'OneHotEncoder') -> pd.DataFrame:
+    # Encode Movement type
+    movement_type_encoded = enc.transform(df[['Movement type']]).toarray()
+    movement_type_df = pd.DataFrame(movement_type_encoded, columns=enc.get_feature_names_out(['Movement type']),
+                                    index=df.index)
+    df = pd.concat([df.drop(['Movement type'], axis=1), movement_type_df], axis=1)
+    return df.drop(['Order Qty', 'Posting Date', 'Year'], axis=1)
+
+def _forecast_row_key(df: pd.DataFrame) -> list:
+    # Identifies the last trained posting, to tell an appended export from a rewritten one
+    last = df.iloc[-1]
+    return [str(last['Posting Date']), float(last['Order Qty']), float(last['Amt.in Loc.Cur.'])]
+
+def _forecast_metrics(bundle: dict) -> dict:
+    from sklearn.metrics import mean_squared_error
+    
+    y_test, y_pred = bundle['test_actual'], bundle['test_predicted']
+    mse = mean_squared_error(y_test, y_pred) if len(y_test) else 0.0
+    accuracy = 100 * (1 - min(1, mse / (y_test.var(ddof=1) if len(y_test) > 1 else 1)))
+    return {"mse": float(mse), "accuracy": float(accuracy),
+            "train_rows": int(bundle['model'].n_rows), "test_rows": int(len(y_test))}
+
+def _forecast_source(path: str) -> pd.DataFrame:
+    # The dashboard's ledger holds every forecast column and has appended postings parsed already
+    return get_ledger(path).frame[PROJECTIONS['forecast']]
+
+def train_forecast_model(path: str = LEDGER_PATH) -> dict:
+    # sklearn takes seconds to import; only training needs it
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder
+    
+    source = _forecast_source(path)
+    df = build_forecast_frame(source)
+    
+    enc = OneHotEncoder(handle_unknown='ignore')
+    enc.fit(df[['Movement type']])
+    X = _forecast_features(df, enc)
+    y = df['Order Qty']
+    
+    # Split data and train model
+    train, test = df['Year'] < TEST_YEAR, df['Year'] == TEST_YEAR
+    
+    # Impute missing values
+    imputer = SimpleImputer(strategy='mean')
+    X_train = imputer.fit_transform(X[train])
+    X_test = imputer.transform(X[test])
+    
+    # Least squares kept as sufficient statistics, so appended postings can be folded in
+    model = OnlineLinearRegression()
+    with span('model_fit'):
+        model.fit(X_train, y[train])
+    with span('predict'):
+        y_pred = model.predict(X_test)
+    
+    bundle = {
+        "encoder": enc,
+        "imputer": imputer,
+        "model": model,
+        "feature_columns": list(X.columns),
+        # datetime64 rather than strings: the bundle is pickled, and updates append to it
+        "test_dates": df.loc[test, 'Posting Date'].to_numpy(dtype='datetime64[D]'),
+        "test_X": X_test,
+        "test_actual": y[test].to_numpy(dtype=float),
+        "test_predicted": y_pred,
+        "source_rows": len(source),
+        "last_row": _forecast_row_key(source),
+    }
+    bundle["metrics"] = _forecast_metrics(bundle)
+    bundle["baseline_mae"] = float(np.abs(bundle['test_actual'] - y_pred).mean()) if len(y_pred) else None
+    return bundle
+
+def update_forecast_model(bundle: dict, path: str = LEDGER_PATH) -> Optional[dict]:
+    """Fold postings appended since `bundle` was built into a copy of it; None if a refit is needed."""
+    if 'source_rows' not in bundle:
+        return None
+    # Slice before projecting: only the new postings and the last trained one are read
+    ledger = get_ledger(path).frame
+    seen = bundle['source_rows']
+    if len(ledger) < seen or _forecast_row_key(ledger.iloc[:seen]) != bundle['last_row']:
+        return None
+    
+    df = build_forecast_frame(ledger.iloc[seen:][PROJECTIONS['forecast']].reset_index(drop=True))
+    enc = bundle['encoder']
+    # A movement type the encoder has never seen changes the feature set
+    if not df['Movement type'].isin(enc.categories_[0]).all():
+        return None
+    X = bundle['imputer'].transform(_forecast_features(df, enc)) if len(df) else np.empty((0, len(bundle['feature_columns'])))
+    y = df['Order Qty'].to_numpy(dtype=float)
+    train = (df['Year'] < TEST_YEAR).to_numpy()
+    test = (df['Year'] == TEST_YEAR).to_numpy()
+    
+    # Judge the current model on the new rows before it learns from them
+    if drifted(y - bundle['model'].predict(X), bundle.get('baseline_mae')):
+        return None
+    
+    updated = dict(bundle)
+    updated['model'] = copy.deepcopy(bundle['model'])
+    if train.any():
+        updated['model'].partial_fit(X[train], y[train])
+    updated['test_X'] = np.vstack([bundle['test_X'], X[test]])
+    updated['test_actual'] = np.concatenate([bundle['test_actual'], y[test]])
+    # np.asarray: bundles written before test_dates became datetime64 hold a list of 'YYYY-MM-DD' strings
+    updated['test_dates'] = np.concatenate([np.asarray(bundle['test_dates'], dtype='datetime64[D]'),
+                                            df.loc[test, 'Posting Date'].to_numpy(dtype='datetime64[D]')])
+    # New training rows move every back-test prediction; otherwise only the new rows need one
+    if train.any():
+        updated['test_predicted'] = updated['model'].predict(updated['test_X'])
+    else:
+        updated['test_predicted'] = np.concatenate([bundle['test_predicted'], updated['model'].predict(X[test])])
+    updated['source_rows'] = len(ledger)
+    updated['last_row'] = _forecast_row_key(ledger)
+    updated['metrics'] = {**_forecast_metrics(updated),
+                          "incremental_updates": bundle['metrics'].get('incremental_updates', 0) + 1}
+    return updated
+
+def forecast_bundle(retrain: bool = False) -> dict:
+    # Fitted once per ledger version; appended postings update the previous fit
+    return model_registry.get('forecast', ledger_fingerprint(LEDGER_PATH), train_forecast_model,
+                              force=retrain, update_fn=update_forecast_model)
+
 @app.get("/api/inventory/forecast")
-async def get_inventory_forecast():
+async def get_inventory_forecast(request: Request):
     try:
-        # Load and prepare data
-        df = pd.read_csv('1111003.csv')
-        df['Posting Date'] = pd.to_datetime(df['Posting Date'], errors='coerce')
-        
-        # Get US and Canadian holidays
-        us_holidays = holidays.US(years=[2020, 2021, 2022, 2023, 2024])
-        ca_holidays = holidays.CA(years=[2020, 2021, 2022, 2023, 2024])
-        all_holidays = list(set(us_holidays.keys()).union(set(ca_holidays.keys())))
-        
-        # Holiday functions
-        def nearest_holiday(posting_date):
-            if pd.notna(posting_date):
-                posting_date = posting_date.date()
-                closest_holiday = min((holiday for holiday in all_holidays if abs((holiday - posting_date).days) <= 15),
-                                  key=lambda x: abs(x - posting_date),
-                                  default=None)
-                if closest_holiday:
-                    return closest_holiday
-            return None
-        
-        def days_to_holiday(posting_date, nearest_holiday):
-            if pd.notna(nearest_holiday) and pd.notna(posting_date):
-                posting_date = posting_date.date()
-                days_difference = (nearest_holiday - posting_date).days
-                return days_difference if abs(days_difference) <= 21 else 0
-            return 0
-        
-        # Process data
-        df['Nearest Holiday'] = df['Posting Date'].apply(nearest_holiday)
-        df['Days to Nearest Holiday'] = df.apply(lambda x: days_to_holiday(x['Posting Date'], x['Nearest Holiday']), axis=1)
-        df.drop(columns='Nearest Holiday', inplace=True)
-        
-        # Drop unnecessary columns and prepare data
-        df = df.drop(columns=['Material', 'Material description', 'Plant', 'Storage location', 'Base Unit of Measure', 
-                            'Movement Type Text', 'User Name', 'Material Document', 'Document Date', 'Vendor', 
-                            'Purchase order', 'Reason for Movement'], axis=1)
-        
-        df['Amt.in Loc.Cur.'] = df['Amt.in Loc.Cur.'].replace('[\$,]', '', regex=True).astype(float)
-        
-        # Encode Movement type
-        enc = OneHotEncoder()
-        movement_type_encoded = enc.fit_transform(df[['Movement type']]).toarray()
-        movement_type_df = pd.DataFrame(movement_type_encoded, columns=enc.get_feature_names_out(['Movement type']))
-        df = pd.concat([df.drop(['Movement type'], axis=1), movement_type_df], axis=1)
-        
-        # Split data and train model
-        df['Year'] = df['Posting Date'].dt.year
-        X = df.drop(['Order Qty', 'Posting Date', 'Year'], axis=1)
-        y = df['Order Qty']
-        
-        X_train = X[df['Year'] < 2024]
-        y_train = y[df['Year'] < 2024]
-        X_test = X[df['Year'] == 2024]
-        y_test = y[df['Year'] == 2024]
-        test_dates = df[df['Year'] == 2024]['Posting Date']
-        
-        # Impute missing values
-        imputer = SimpleImputer(strategy='mean')
-        X_train = imputer.fit_transform(X_train)
-        X_test = imputer.transform(X_test)
-        
-        # Train model and make predictions
-        model = LinearRegression()
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        
-        # Prepare response data
-        forecast_data = []
-        for date, actual, predicted in zip(test_dates, y_test, y_pred):
-            forecast_data.append({
-                "date": date.strftime('%Y-%m-%d'),
-                "actualSales": float(actual),
-                "predictedSales": float(predicted)
+        bundle = await run_cpu(forecast_bundle)
+        
+        def render(fmt):
+            # Back-test rows as columns; no per-row dicts
+            dates = np.asarray(bundle['test_dates'], dtype='datetime64[D]')
+            frame = pd.DataFrame({"date": np.datetime_as_string(dates, unit='D'),
+                                  "actualSales": bundle['test_actual'],
+                                  "predictedSales": bundle['test_predicted']})
+            accuracy = bundle['metrics']['accuracy']
+            if fmt == 'arrow':
+                return frame_arrow(frame, metadata={"forecastAccuracy": accuracy})
+            return b'{"forecastAccuracy":' + dumps(accuracy) + b',"forecastData":' + frame_json(frame) + b'}'
+        
+        return await run_cpu(versioned_response, request, f"{_data_version()}:{_model_version(bundle)}", render)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error generating forecast")
+        raise HTTPException(status_code=500, detail=f"Error generating forecast: {str(e)}")
+
+@app.post("/api/inventory/forecast/retrain")
+async def retrain_forecast_model():
+    # A full refit of the current ledger version, discarding incremental updates
+    try:
+        bundle = await run_cpu(forecast_bundle, True)
+    except Exception as e:
+        logger.exception("Error retraining forecast model")
+        raise HTTPException(status_code=500, detail=f"Error retraining forecast model: {str(e)}")
+    return {"message": "Forecast model retrained", "metrics": bundle['metrics']}
+
+def horizon_bundle(retrain: bool = False) -> dict:
+    # One pooled model per ledger version, covering every material
+    ledger = get_ledger()
+    return model_registry.get('horizon', ledger_fingerprint(LEDGER_PATH),
+                              lambda: train_horizon_model(ledger.frame), force=retrain)
+
+@app.get("/api/inventory/forecast/horizon")
+async def get_horizon_forecast(request: Request, material: Optional[List[str]] = Query(None),
+                               periods: int = 6, level: float = 0.8):
+    """Biweekly forecasts with prediction intervals for many materials (all by default)."""
+    if not 1 <= periods <= 26:
+        raise HTTPException(status_code=400, detail="periods must be between 1 and 26")
+    if not 0 < level < 1:
+        raise HTTPException(status_code=400, detail="level must be between 0 and 1")
+    try:
+        bundle = await run_cpu(horizon_bundle)
+        
+        def render(fmt):
+            ids, dates, predicted, lower, upper = forecast_horizon(bundle, periods, level, material)
+            if fmt == 'arrow':
+                # Long format: one row per material and period
+                frame = pd.DataFrame({"material": np.repeat(ids, periods), "date": np.tile(dates.to_numpy(), len(ids)),
+                                      "predicted": predicted.ravel(), "lower": lower.ravel(), "upper": upper.ravel()})
+                return frame_arrow(frame, metadata={"periodDays": PERIOD_DAYS, "level": level})
+            return dumps({
+                "periodDays": PERIOD_DAYS,
+                "level": level,
+                "dates": dates.strftime('%Y-%m-%d').tolist(),
+                "forecasts": {
+                    material_id: {"predicted": p, "lower": lo, "upper": hi}
+                    for material_id, p, lo, hi in zip(ids.tolist(), predicted, lower, upper)
+                },
+                "missing": sorted(set(material) - set(ids.tolist())) if material else []
             })
         
-        # Calculate accuracy
-        mse = mean_squared_error(y_test, y_pred)
-        accuracy = 100 * (1 - min(1, mse / (y_test.var() if len(y_test) > 1 else 1)))
-        
-        return {
-            "forecastAccuracy": float(accuracy),
-            "forecastData": forecast_data
-        }
-        
+        return await run_cpu(versioned_response, request, f"{_data_version()}:{_model_version(bundle)}", render)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error details: {str(e)}")
+        logger.exception("Error generating horizon forecast")
         raise HTTPException(status_code=500, detail=f"Error generating forecast: {str(e)}")
 
+@app.post("/api/inventory/forecast/horizon/retrain")
+async def retrain_horizon_model():
+    try:
+        bundle = await run_cpu(horizon_bundle, True)
+    except Exception as e:
+        logger.exception("Error retraining horizon model")
+        raise HTTPException(status_code=500, detail=f"Error retraining horizon model: {str(e)}")
+    return {"message": "Horizon model retrained", "metrics": bundle['metrics']}
+
+@app.get("/api/inventory/models")
+async def get_model_metrics():
+    return model_registry.metrics()
+
 @app.post("/api/inventory/reorder-rules")
 async def create_reorder_rule(rule: ReorderRule):
     try:
-        reorder_rules.append(rule)
+        order_store.add_rules([rule.dict()])
         return {"message": "Reorder rule created successfully", "rule": rule}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/inventory/reorder-rules/bulk")
+async def create_reorder_rules(rules: List[ReorderRule]):
+    try:
+        created = order_store.add_rules([rule.dict() for rule in rules])
+        return {"message": f"Created {len(created)} reorder rules", "count": len(created)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/inventory/reorder-rules")
-async def get_reorder_rules():
-    return reorder_rules
+async def get_reorder_rules(limit: int = 100, offset: int = 0, material_id: Optional[str] = None):
+    return order_store.list_rules(limit=limit, offset=offset, material_id=material_id)
 
 @app.get("/api/inventory/orders")
-async def get_orders():
-    return orders
+async def get_orders(limit: int = 100, offset: int = 0, status: Optional[str] = None,
+                     material_id: Optional[str] = None):
+    return order_store.list_orders(limit=limit, offset=offset, status=status, material_id=material_id)
+
+@app.get("/api/inventory/orders/{order_id}")
+async def get_order(order_id: int):
+    order = order_store.get_order(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+def run_reorder_cycle(retrain: bool = False) -> dict:
+    ledger = get_ledger()
+    
+    # Get forecast data to make smarter decisions
+    bundle = reorder_bundle(ledger, retrain)
+    
+    # Each rule is checked against its own material's stock and forecast in one pass;
+    # unknown materials fall back to the ledger-wide figures
+    with span('rule_eval'):
+        due = evaluate_rules(order_store.rules_frame(),
+                             ledger.aggregates.stock_by_material, material_forecasts(),
+                             default_stock=ledger.current_stock, default_forecast=bundle['forecast'])
+    
+    # Ids are allocated by the store inside a single write transaction
+    new_orders = order_store.create_orders(due)
+    
+    return {
+        "message": f"Created {len(new_orders)} new orders",
+        "orders": new_orders
+    }
 
 @app.post("/api/inventory/check-reorder")
-async def check_and_create_orders():
+async def check_and_create_orders(retrain: bool = False):
     try:
-        df = prepare_data()
-        new_orders = []
-        current_stock = df['Total stock'].iloc[-1]
-        
-        # Get forecast data to make smarter decisions
-        biweekly_data = create_features(df)
-        model, features, _ = train_model(biweekly_data)
-        forecast = generate_forecast(biweekly_data, model, features)
-        
-        for rule in reorder_rules:
-            # Check if current stock is below reorder point
-            if current_stock <= rule.reorder_point:
-                # Consider forecast in ordering decision
-                adjusted_quantity = max(
-                    rule.order_quantity,
-                    int(forecast * 1.1)  # Add 10% buffer to forecasted demand
-                )
-                
-                new_order = Order(
-                    id=len(orders) + 1,
-                    material_id=rule.material_id,
-                    quantity=adjusted_quantity,
-                    status="pending",
-                    created_at=datetime.now(),
-                    vendor=rule.vendor,
-                    expected_delivery=datetime.now() + timedelta(days=rule.lead_time_days)
-                )
-                orders.append(new_order)
-                new_orders.append(new_order)
-        
-        return {
-            "message": f"Created {len(new_orders)} new orders",
-            "orders": new_orders
-        }
+        return await run_cpu(run_reorder_cycle, retrain)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def refresh_models() -> dict:
+    """Update (or retrain) whichever models are stale for the current ledger, so requests only do lookups."""
+    forecast_bundle()
+    reorder_bundle(get_ledger())
+    return {"fingerprint": ledger_fingerprint(LEDGER_PATH)}
+
+def prewarm() -> dict:
+    """Parse the ledger and load (or train) the dashboard models, timing each step."""
+    steps = [('ledger', get_ledger), ('forecast_model', forecast_bundle),
+             ('reorder_model', lambda: reorder_bundle(get_ledger()))]
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            with span(f'prewarm_{name}'):
+                step()
+        except Exception:
+            # The first request for it will retry and report the error
+            logger.exception("Prewarming %s failed", name)
+            continue
+        startup_timings[f'prewarm_{name}'] = time.perf_counter() - started
+    startup_timings['prewarmed'] = True
+    logger.info("Prewarm finished: %s", startup_timings)
+    return startup_timings
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "pid": os.getpid(), "timings": startup_timings}
+
+registry.gauge('stockflow_startup_seconds', 'Import, startup and prewarm durations of this worker.',
+               lambda: [((phase,), seconds) for phase, seconds in startup_timings.items()
+                        if not isinstance(seconds, bool)],
+               labelnames=['phase'])
+registry.gauge('stockflow_ledger_cache_entries', 'Parsed ledger files held in memory.',
+               lambda: [((), ledger_cache.stats()['entries'])])
+registry.gauge('stockflow_notifications', 'Teams notifications by outcome since start.',
+               lambda: [((state,), count) for state, count in notification_dispatcher.stats.items()],
+               labelnames=['state'])
+registry.gauge('stockflow_job_runs', 'Scheduled job runs and failures since start.',
+               lambda: [((job['name'], key), job[key]) for job in scheduler.stats() for key in ('runs', 'failures', 'skipped')],
+               labelnames=['job', 'result'])
+
+# Background jobs; interval settings are in seconds
+scheduler = Scheduler()
+scheduler.add_job('shortage-check', evaluate_alerts,
+                  float(os.environ.get('ALERT_INTERVAL_SECONDS', 300)))
+scheduler.add_job('model-refresh', refresh_models,
+                  float(os.environ.get('MODEL_REFRESH_INTERVAL_SECONDS', 900)))
+# Creating orders is a side effect; wait a full interval instead of firing on every restart
+scheduler.add_job('reorder-cycle', run_reorder_cycle,
+                  float(os.environ.get('REORDER_INTERVAL_SECONDS', 3600)), run_at_start=False)
+
+@app.get("/api/scheduler/jobs")
+async def get_scheduler_jobs():
+    return {"enabled": SCHEDULER_ENABLED, "leader": scheduler_lock.held, "jobs": scheduler.stats()}
+
+@app.post("/api/scheduler/jobs/{name}/run")
+async def run_scheduler_job(name: str):
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    await scheduler.run_now(name)
+    return scheduler.jobs[name].stats()
+
 @app.put("/api/inventory/orders/{order_id}/status")
 async def update_order_status(order_id: int, status: str):
     try:
-        for order in orders:
-            if order.id == order_id:
-                order.status = status
-                return {"message": "Order status updated", "order": order}
-        raise HTTPException(status_code=404, detail="Order not found")
+        order = order_store.update_order_status(order_id, status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return {"message": "Order status updated", "order": Order(**order)}
+
+startup_timings['import'] = time.perf_counter() - _import_started
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # STOCKFLOW_WORKERS=N starts N processes sharing the ledger snapshot and model files
+    serve("main:app", host="0.0.0.0", port=8000)
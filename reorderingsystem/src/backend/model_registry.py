@@ -0,0 +1,126 @@
+import json
+import os
+from datetime import datetime
+
+from instrumentation import CACHE_EVENTS, span
+from versioned_store import VersionedStore
+
+# Incremental updates of a model kept only in memory before one is written
+PERSIST_EVERY = int(os.environ.get('STOCKFLOW_PERSIST_EVERY', 20))
+
+
+class ModelRegistry(VersionedStore):
+    """Trained models persisted per ledger version.
+
+    Each model name maps to a bundle (fitted estimators plus whatever the
+    caller needs to serve predictions) trained for one ledger fingerprint.
+    Bundles are kept in memory and written to <root>/<name>/<fingerprint>.joblib
+    with a JSON metrics file alongside, so a restart reuses the last fit. A
+    new fingerprint, or force=True, is the only thing that triggers training.
+
+    When the caller also passes update_fn, a new fingerprint first tries
+    update_fn(previous_bundle): an incremental update of the last version in
+    memory (or on disk after a restart). It returns None when the update
+    isn't safe (drift, rewritten ledger...), and then train_fn() runs.
+
+    Trained bundles are written at once. Updates are cheap to redo from an
+    older file but writing a bundle is not, so only every persist_every-th
+    update is written, and flush() writes the rest (at shutdown). Until
+    then, other workers and a restarted one update from the last file.
+
+    With several workers, a lock file per model name makes one process
+    train a version while the others wait and then load its file. Bundles
+    are loaded with mmap_mode='c': their numpy arrays stay in the page cache
+    that every worker shares, and are copied only if a process writes to them.
+    """
+
+    mmap_mode = 'c'
+    sidecars = ('.json',)
+
+    def __init__(self, root='models', keep_versions=2, persist_every=PERSIST_EVERY):
+        super().__init__(root, keep_versions)
+        self.persist_every = persist_every
+        self._unsaved = {}  # name -> incremental updates since its last write
+
+    def get(self, name, fingerprint, train_fn, force=False, update_fn=None):
+        """Return the bundle for (name, fingerprint), training it with train_fn() if needed.
+
+        train_fn must return a dict; its optional 'metrics' entry is also
+        written to the JSON sidecar.
+        """
+        loaded = self._loaded.get(name)
+        if not force and loaded is not None and loaded[0] == fingerprint:
+            CACHE_EVENTS.inc('model', 'hit')
+            return loaded[1]
+
+        # One trainer per model name, across workers; later callers pick up its result
+        with self.locked(name):
+            loaded = self._loaded.get(name)
+            if not force and loaded is not None and loaded[0] == fingerprint:
+                CACHE_EVENTS.inc('model', 'shared')
+                return loaded[1]
+
+            model_path = self._path(name, fingerprint)
+            if not force and os.path.exists(model_path):
+                CACHE_EVENTS.inc('model', 'disk')
+                with span('model_load'):
+                    bundle = self._load(model_path)
+            else:
+                previous = None if force or update_fn is None else (loaded or self._latest(name))
+                bundle = None
+                if previous is not None:
+                    with span(f'update_{name}'):
+                        bundle = update_fn(previous[1])
+                if bundle is not None:
+                    CACHE_EVENTS.inc('model', 'update')
+                    unsaved = self._unsaved.get(name, 0) + 1
+                else:
+                    CACHE_EVENTS.inc('model', 'train')
+                    with span(f'train_{name}'):
+                        bundle = train_fn()
+                    unsaved = None
+                if unsaved is None or unsaved >= self.persist_every:
+                    self._save(name, fingerprint, bundle)
+                    unsaved = 0
+                self._unsaved[name] = unsaved
+            self._loaded[name] = (fingerprint, bundle)
+            return bundle
+
+    def flush(self):
+        """Write the bundles whose latest incremental updates are only in memory."""
+        for name in list(self._unsaved):
+            with self.locked(name):
+                if self._unsaved.get(name):
+                    fingerprint, bundle = self._loaded[name]
+                    self._save(name, fingerprint, bundle)
+                    self._unsaved[name] = 0
+
+    def _save(self, name, fingerprint, bundle):
+        model_path = self._dump(name, fingerprint, bundle)
+        metrics = {
+            'name': name,
+            'fingerprint': fingerprint,
+            'trained_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'metrics': bundle.get('metrics', {}),
+        }
+        with open(model_path[:-len('.joblib')] + '.json', 'w') as f:
+            json.dump(metrics, f)
+        self._prune(name)
+
+    def metrics(self):
+        """Metrics of every persisted model version, newest first."""
+        results = []
+        if not os.path.isdir(self.root):
+            return results
+        for name in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, name)
+            if not os.path.isdir(directory):
+                continue
+            for f in os.listdir(directory):
+                if f.endswith('.json'):
+                    with open(os.path.join(directory, f)) as fh:
+                        results.append(json.load(fh))
+        return sorted(results, key=lambda m: m['trained_at'], reverse=True)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,198 @@
+"""Teams notifications through the Power Automate webhook.
+
+send_teams_notification() is the blocking one-shot used by scripts. The API
+uses NotificationDispatcher instead: notify() only enqueues, and a
+background task coalesces queued messages per recipient list and posts them
+from a worker thread over a pooled session, retrying with exponential
+backoff. Alert fan-out therefore never adds latency to a response.
+
+The webhook URL comes from TEAMS_WEBHOOK_URL. For local testing, set
+TEAMS_STUB=1 and point TEAMS_WEBHOOK_URL at /api/notifications/stub; the
+stub records payloads instead of delivering them.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import APIRouter
+
+logger = logging.getLogger(__name__)
+
+TEAMS_WEBHOOK_URL = os.environ.get('TEAMS_WEBHOOK_URL', '')
+BATCH_SEPARATOR = "\n\n---\n\n"
+
+
+def make_session(pool_size=4):
+    # requests is imported when the dispatcher starts, not when the API module loads
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def post_notification(session, url, recipients, message, timeout=10, retries=3, backoff=0.5):
+    """POST one message to the webhook. Returns True once it is accepted."""
+    import requests
+
+    if not url:
+        logger.warning("TEAMS_WEBHOOK_URL is not set; dropping notification for %s", recipients)
+        return False
+    payload = {"Recipients": recipients, "Message": message}
+    for attempt in range(retries + 1):
+        try:
+            response = session.post(url, json=payload, timeout=timeout)
+            if response.status_code == 200:
+                return True
+            # Client errors other than throttling won't succeed on retry
+            if response.status_code < 500 and response.status_code != 429:
+                logger.error("Teams notification rejected (%s): %s", response.status_code, response.text)
+                return False
+            logger.warning("Teams notification failed (%s), attempt %d", response.status_code, attempt + 1)
+        except requests.RequestException as e:
+            logger.warning("Error sending Teams notification, attempt %d: %s", attempt + 1, e)
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+    return False
+
+
+_session = None
+
+
+def send_teams_notification(recipients, message, url=None):
+    """Blocking send for scripts; reuses one pooled session per process."""
+    global _session
+    if _session is None:
+        _session = make_session()
+    sent = post_notification(_session, url or TEAMS_WEBHOOK_URL, recipients, message)
+    if sent:
+        print("Teams notification sent successfully!")
+    return sent
+
+
+class NotificationDispatcher:
+    def __init__(self, url=None, max_queue=1000, batch_window=2.0, pool_size=4,
+                 timeout=10, retries=3, backoff=0.5):
+        self.url = url if url is not None else TEAMS_WEBHOOK_URL
+        self.batch_window = batch_window
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self._queue = None
+        self._session = None
+        self._task = None
+        self._loop = None
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "batches": 0}
+
+    async def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._session = make_session(self.pool_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout=5.0):
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %d undelivered notifications on shutdown", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._session.close()
+
+    def notify(self, recipients, message):
+        """Queue a message without waiting on the network. Returns False if it was dropped.
+
+        Safe to call from worker threads (e.g. scheduled jobs); the message is
+        then handed to the dispatcher's loop and a full queue is only logged.
+        """
+        if self._queue is None:
+            self.stats["dropped"] += 1
+            logger.error("Notification dispatcher not started; dropping message for %s", recipients)
+            return False
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:
+            self._loop.call_soon_threadsafe(self._enqueue, recipients, message)
+            return True
+        return self._enqueue(recipients, message)
+
+    def _enqueue(self, recipients, message):
+        try:
+            self._queue.put_nowait((recipients, message))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.error("Notification queue full; dropping message for %s", recipients)
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    async def _collect_batch(self):
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        limit = asyncio.Semaphore(self.pool_size)
+        loop = asyncio.get_running_loop()
+
+        async def deliver(recipients, messages):
+            async with limit:
+                sent = await loop.run_in_executor(
+                    None, post_notification, self._session, self.url, recipients,
+                    BATCH_SEPARATOR.join(messages), self.timeout, self.retries, self.backoff)
+            self.stats["sent" if sent else "failed"] += 1
+
+        while True:
+            batch = await self._collect_batch()
+            try:
+                # One message per recipient list; identical alerts are sent once
+                grouped = OrderedDict()
+                for recipients, message in batch:
+                    grouped.setdefault(recipients, OrderedDict())[message] = None
+                self.stats["batches"] += 1
+                await asyncio.gather(*(deliver(r, list(m)) for r, m in grouped.items()))
+            except Exception as e:
+                logger.error("Notification batch failed: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+# Local stand-in for the Power Automate flow, mounted when TEAMS_STUB is set
+stub_router = APIRouter()
+stub_received = []
+
+
+@stub_router.post("/api/notifications/stub")
+async def receive_stub_notification(payload: dict):
+    stub_received.append(payload)
+    return {"received": len(stub_received)}
+
+
+@stub_router.get("/api/notifications/stub")
+async def list_stub_notifications():
+    return stub_received
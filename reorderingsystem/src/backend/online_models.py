@@ -0,0 +1,81 @@
+"""Estimators that can take new rows without a full refit.
+
+OnlineLinearRegression keeps ordinary least squares as its sufficient
+statistics (X'X and X'y). Adding rows costs O(rows x features^2), and the
+solution matches a refit on all the rows. grow_forest() warm-starts a
+fitted RandomForestRegressor with a few extra trees fitted on recent
+periods. The forest has to be refit from scratch once it reaches
+MAX_TREES, so old trees can't pile up forever.
+
+drifted() is the shared trigger for a full refit: the model's error on the
+new rows, compared with the error it had when it was last fully trained.
+"""
+import numpy as np
+
+# Trees added to a forest per incremental update, and the size that forces a refit
+WARM_START_TREES = 10
+MAX_TREES = 200
+
+# New-row error, as a multiple of the error measured at full training, that counts as drift
+DRIFT_RATIO = 1.5
+# Fewer new rows than this are too noisy to judge drift on
+MIN_DRIFT_ROWS = 5
+
+
+class OnlineLinearRegression:
+    """Least squares with an intercept, updatable via partial_fit()."""
+
+    def __init__(self):
+        self.xtx = None
+        self.xty = None
+        self.n_rows = 0
+        self.coef_ = None
+        self.intercept_ = 0.0
+
+    @staticmethod
+    def _design(X):
+        X = np.asarray(X, dtype=float)
+        return np.column_stack([np.ones(len(X)), X])
+
+    def fit(self, X, y):
+        self.xtx = None
+        self.xty = None
+        self.n_rows = 0
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        A = self._design(X)
+        y = np.asarray(y, dtype=float)
+        if self.xtx is None:
+            self.xtx = np.zeros((A.shape[1], A.shape[1]))
+            self.xty = np.zeros(A.shape[1])
+        self.xtx += A.T @ A
+        self.xty += A.T @ y
+        self.n_rows += len(y)
+        # lstsq gives the minimum-norm solution when one-hot columns are collinear
+        beta = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        self.intercept_, self.coef_ = beta[0], beta[1:]
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+
+def grow_forest(model, X, y, n_trees=WARM_START_TREES):
+    """Add n_trees fitted on X, y to an already fitted forest. Returns False if it is full or not a forest."""
+    from sklearn.ensemble import RandomForestRegressor
+
+    if not isinstance(model, RandomForestRegressor) or len(model.estimators_) + n_trees > MAX_TREES:
+        return False
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return True
+
+
+def drifted(errors, baseline):
+    """True if the mean absolute error on new rows exceeds DRIFT_RATIO x baseline."""
+    errors = np.asarray(errors, dtype=float)
+    if len(errors) < MIN_DRIFT_ROWS or not baseline:
+        return False
+    return float(np.abs(errors).mean()) > DRIFT_RATIO * baseline
@@ -0,0 +1,150 @@
+"""SQLite storage for reorder rules and purchase orders.
+
+One database file is shared by every uvicorn worker (see sqlite_store).
+Ids come from AUTOINCREMENT inside the writing transaction, so concurrent
+requests can't hand out the same order id. A material gets at most one open
+order: create_orders() skips materials that already have one, checked under
+the same write lock, and of several orders for one material in a batch (one
+per matching rule) it keeps the largest. Lookups go through the primary key and the
+material/status indexes.
+"""
+import logging
+
+import pandas as pd
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reorder_rules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    material_id TEXT NOT NULL,
+    min_stock REAL NOT NULL,
+    reorder_point REAL NOT NULL,
+    order_quantity REAL NOT NULL,
+    vendor TEXT NOT NULL,
+    lead_time_days INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reorder_rules_material ON reorder_rules (material_id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    material_id TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    expected_delivery TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_material ON orders (material_id);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+"""
+
+RULE_FIELDS = ['material_id', 'min_stock', 'reorder_point', 'order_quantity', 'vendor', 'lead_time_days']
+ORDER_FIELDS = ['material_id', 'quantity', 'status', 'created_at', 'vendor', 'expected_delivery']
+# Orders still on their way; while one exists its material is not ordered again
+OPEN_STATUSES = ('pending', 'open')
+
+logger = logging.getLogger(__name__)
+
+
+class OrderStore(SQLiteStore):
+    schema = SCHEMA
+
+    # Reorder rules
+
+    def add_rules(self, rules):
+        """Insert rule dicts in one transaction; returns them with their ids."""
+        with self._transaction() as conn:
+            created = []
+            for rule in rules:
+                cur = conn.execute(
+                    f"INSERT INTO reorder_rules ({', '.join(RULE_FIELDS)}) VALUES ({', '.join('?' * len(RULE_FIELDS))})",
+                    [rule[f] for f in RULE_FIELDS])
+                created.append({'id': cur.lastrowid, **{f: rule[f] for f in RULE_FIELDS}})
+            return created
+
+    def list_rules(self, limit=None, offset=0, material_id=None):
+        query = "SELECT * FROM reorder_rules"
+        params = []
+        if material_id is not None:
+            query += " WHERE material_id = ?"
+            params.append(material_id)
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return [dict(row) for row in self._connection().execute(query, params)]
+
+    def rules_frame(self):
+        """All rules as a DataFrame, for vectorized evaluation."""
+        return pd.read_sql_query("SELECT * FROM reorder_rules ORDER BY id", self._connection())
+
+    # Orders
+
+    def create_orders(self, orders):
+        """Bulk-insert an orders DataFrame (ORDER_FIELDS columns); returns the created rows with their ids.
+
+        Orders for a material that already has an open order are skipped. If
+        several rules order the same material, only the largest quantity is
+        ordered: it is the one that covers every rule's reorder point. Skipped
+        orders are logged.
+        """
+        if len(orders) == 0:
+            return []
+        orders = orders[ORDER_FIELDS].copy()
+        for col in ('created_at', 'expected_delivery'):
+            orders[col] = pd.to_datetime(orders[col]).dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+        with self._transaction() as conn:
+            # Checked under the write lock, so two workers' cycles can't both order a material
+            open_materials = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT material_id FROM orders WHERE status IN ({', '.join('?' * len(OPEN_STATUSES))})",
+                OPEN_STATUSES)]
+            already_open = orders['material_id'].astype(str).isin(open_materials)
+            if already_open.any():
+                logger.info("Not ordering %s again: an order is still open",
+                            ', '.join(orders.loc[already_open, 'material_id'].astype(str).unique()))
+            orders = orders[~already_open]
+            largest = orders.sort_values('quantity', ascending=False, kind='stable').drop_duplicates('material_id')
+            if len(largest) < len(orders):
+                duplicates = orders.drop(largest.index)
+                skipped = zip(duplicates['material_id'], duplicates['quantity'])
+                logger.info("Ordering the largest quantity only; skipped %s",
+                            ', '.join(f"{material} x {quantity:g}" for material, quantity in skipped))
+            orders = largest.sort_index().reset_index(drop=True)
+            rows = list(orders.itertuples(index=False, name=None))
+            if not rows:
+                return []
+
+            # Under the write lock AUTOINCREMENT hands out consecutive ids after the current sequence
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'orders'").fetchone()
+            first_id = (seq[0] if seq else 0) + 1
+            conn.executemany(
+                f"INSERT INTO orders ({', '.join(ORDER_FIELDS)}) VALUES ({', '.join('?' * len(ORDER_FIELDS))})",
+                rows)
+        orders.insert(0, 'id', range(first_id, first_id + len(rows)))
+        return orders.to_dict('records')
+
+    def get_order(self, order_id):
+        row = self._connection().execute("SELECT * FROM orders WHERE id = ?", (order_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update_order_status(self, order_id, status):
+        with self._transaction() as conn:
+            cur = conn.execute("UPDATE orders SET status = ? WHERE id = ?", (status, order_id))
+            if cur.rowcount == 0:
+                return None
+            return dict(conn.execute("SELECT * FROM orders WHERE id = ?", (order_id,)).fetchone())
+
+    def list_orders(self, limit=None, offset=0, status=None, material_id=None):
+        query = "SELECT * FROM orders"
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if material_id is not None:
+            clauses.append("material_id = ?")
+            params.append(material_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return [dict(row) for row in self._connection().execute(query, params)]
@@ -0,0 +1,58 @@
+"""Vectorized reorder evaluation across the whole rule table.
+
+Every rule is checked against the current stock and forecast of its own
+material in one pass over column arrays. Materials the ledger doesn't know
+(e.g. rules typed in on the dashboard) fall back to the ledger-wide stock
+and forecast, which is what every rule used to see.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from ledger_cache import LedgerCache
+
+FORECASTS_PATH = os.environ.get('STOCKFLOW_FORECASTS', 'forecasts.csv')
+
+# Safety margin applied to forecast demand when sizing an order
+FORECAST_BUFFER = 1.1
+
+# Re-read when batch_forecast.py rewrites the file; kept apart from the ledgers and their metrics
+forecast_cache = LedgerCache(max_entries=1, label='forecasts')
+
+
+def _read_forecast_table(path):
+    table = pd.read_csv(path, dtype={'Material': str})
+    table = table[table['status'] == 'ok']
+    # One figure per material: sum the per-plant forecasts
+    return table.groupby('Material')['forecast'].sum()
+
+
+def material_forecasts(path=FORECASTS_PATH):
+    """Per-material forecasts from the latest batch_forecast.py run, if there is one."""
+    if not os.path.exists(path):
+        return pd.Series(dtype=float)
+    return forecast_cache.get(path, _read_forecast_table)
+
+
+def evaluate_rules(rules, stock_by_material, forecast_by_material, default_stock, default_forecast,
+                   now=None):
+    """Return the orders due for `rules` as a DataFrame ready for OrderStore.create_orders()."""
+    now = now or pd.Timestamp.now()
+    material = rules['material_id'].astype(str)
+    stock = material.map(stock_by_material).fillna(default_stock).to_numpy(dtype=float)
+    forecast = material.map(forecast_by_material).fillna(default_forecast).to_numpy(dtype=float)
+
+    due = stock <= rules['reorder_point'].to_numpy(dtype=float)
+    # Consider forecast in ordering decision, truncated like int() did per rule
+    quantity = np.maximum(rules['order_quantity'].to_numpy(dtype=float), np.trunc(forecast * FORECAST_BUFFER))
+
+    selected = rules.loc[due]
+    return pd.DataFrame({
+        'material_id': selected['material_id'].to_numpy(),
+        'quantity': quantity[due],
+        'status': 'pending',
+        'created_at': now,
+        'vendor': selected['vendor'].to_numpy(),
+        'expected_delivery': now + pd.to_timedelta(selected['lead_time_days'].to_numpy(), unit='D'),
+    })
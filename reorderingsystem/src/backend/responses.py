@@ -0,0 +1,179 @@
+"""Serialized, compressed and revalidated API responses.
+
+Large payloads skip FastAPI's jsonable_encoder. DataFrames are written
+straight from their columns by pandas' C JSON writer (or as an Arrow IPC
+stream with ?format=arrow), and everything else goes through orjson. Bodies
+are gzip- or brotli-compressed when the client accepts it. They are tagged
+with an ETag derived from the data version (the ledger fingerprint) and
+the request URL, so an unchanged dashboard gets a 304. Encoded bodies for
+recent versions are kept in a small LRU cache, and repeat requests from
+other clients skip rendering and compression too.
+"""
+import gzip
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import HTTPException, Response
+
+from instrumentation import CACHE_EVENTS, span
+
+try:
+    import orjson
+except ImportError:  # plain json is slower but produces the same payloads
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+JSON_MEDIA_TYPE = 'application/json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_ENTRIES = 64
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """JSON bytes for plain Python/numpy content."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(',', ':')).encode()
+
+
+def frame_json(df):
+    """A DataFrame as a JSON array of records, serialized column-wise in C."""
+    return df.to_json(orient='records', double_precision=15, date_format='iso').encode()
+
+
+def frame_arrow(df, metadata=None):
+    """A DataFrame as an Arrow IPC stream; `metadata` values are stored as JSON in the schema."""
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow responses need pyarrow on the server")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), **{k.encode(): dumps(v) for k, v in metadata.items()}})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def requested_format(request):
+    fmt = request.query_params.get('format')
+    if fmt is None:
+        fmt = 'arrow' if ARROW_MEDIA_TYPE in request.headers.get('accept', '') else 'json'
+    if fmt not in ('json', 'arrow'):
+        raise HTTPException(status_code=400, detail="format must be json or arrow")
+    return fmt
+
+
+def _encoding(request, size):
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    accepted = {part.split(';')[0].strip() for part in request.headers.get('accept-encoding', '').split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class BodyCache:
+    """LRU of encoded bodies keyed by (etag, content encoding)."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+body_cache = BodyCache()
+
+
+def versioned_response(request, version, render):
+    """Serve render(fmt) -> bytes for data `version`, with ETag/304 and compression.
+
+    `render` is only called when neither the client nor the body cache has
+    this version already, so `version` must change whenever the rendered
+    body would (a retrained model changes its metrics, hence the version).
+    """
+    fmt = requested_format(request)
+    media_type = ARROW_MEDIA_TYPE if fmt == 'arrow' else JSON_MEDIA_TYPE
+    query = sorted((k, v) for k, v in request.query_params.multi_items() if k != 'profile')
+    tag = hashlib.sha1(f"{version}|{request.url.path}|{query}|{fmt}".encode()).hexdigest()[:20]
+    # Weak: the same representation may be sent gzip'd, brotli'd or plain
+    etag = f'W/"{tag}"'
+    headers = {'ETag': etag, 'Vary': 'Accept, Accept-Encoding', 'Cache-Control': 'no-cache'}
+
+    if etag in request.headers.get('if-none-match', ''):
+        CACHE_EVENTS.inc('response', 'not_modified')
+        return Response(status_code=304, headers=headers)
+
+    accepted = request.headers.get('accept-encoding', '')
+    body = body_cache.get((tag, accepted))
+    if body is not None:
+        CACHE_EVENTS.inc('response', 'hit')
+        encoding, payload = body
+    else:
+        CACHE_EVENTS.inc('response', 'miss')
+        with span('serialize'):
+            raw = render(fmt)
+        encoding = _encoding(request, len(raw))
+        with span('compress'):
+            payload = _compress(raw, encoding)
+        body_cache.put((tag, accepted), (encoding, payload))
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(content=payload, media_type=media_type, headers=headers)
+
@@ -0,0 +1,128 @@
+"""In-process asyncio scheduler for periodic backend work.
+
+Each job is a plain (blocking) callable that runs in the default thread
+executor, so the event loop keeps serving requests while it works. Runs
+start every `interval` seconds with +/- `jitter` spread, so several workers
+don't all fire at once. A tick that arrives while the previous run is still
+going is skipped rather than stacked. The last result and per-job timings
+are kept for the API to read.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    def __init__(self, name, func, interval, jitter=0.1, timeout=None, run_at_start=True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.run_at_start = run_at_start
+        self.result = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = None
+        self.last_started = None
+        self.last_error = None
+
+    def next_delay(self):
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "lastStarted": self.last_started,
+            "lastSeconds": self.last_seconds,
+            "avgSeconds": self.total_seconds / self.runs if self.runs else None,
+            "maxSeconds": self.max_seconds,
+            "lastError": self.last_error,
+        }
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._tasks = []
+        self._runs = set()
+
+    def add_job(self, name, func, interval, **kwargs):
+        self.jobs[name] = Job(name, func, interval, **kwargs)
+
+    def latest(self, name):
+        job = self.jobs.get(name)
+        return job.result if job is not None else None
+
+    def stats(self):
+        return [job.stats() for job in self.jobs.values()]
+
+    async def start(self):
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._runs, return_exceptions=True)
+        self._tasks = []
+
+    async def run_now(self, name):
+        """Run a job immediately (e.g. from an admin endpoint); skipped if it is already running."""
+        return await self._run(self.jobs[name])
+
+    async def _loop(self, job):
+        if not job.run_at_start:
+            await asyncio.sleep(job.next_delay())
+        while True:
+            if job.running:
+                job.skipped += 1
+            else:
+                # Don't await: the next tick is timed from this start, not from the end
+                run = asyncio.create_task(self._run(job))
+                self._runs.add(run)
+                run.add_done_callback(self._runs.discard)
+            await asyncio.sleep(job.next_delay())
+
+    async def _run(self, job):
+        if job.running:
+            job.skipped += 1
+            return job.result
+        job.running = True
+        job.last_started = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        started = time.perf_counter()
+        try:
+            work = asyncio.get_running_loop().run_in_executor(None, job.func)
+            try:
+                job.result = await asyncio.wait_for(asyncio.shield(work), job.timeout)
+            except asyncio.TimeoutError:
+                job.failures += 1
+                logger.error("Scheduled job %s exceeded %ss", job.name, job.timeout)
+                # The worker thread can't be interrupted; stay marked as running until it returns
+                job.result = await work
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e) or type(e).__name__
+            logger.error("Scheduled job %s failed: %s", job.name, job.last_error)
+        finally:
+            elapsed = time.perf_counter() - started
+            job.runs += 1
+            job.running = False
+            job.last_seconds = elapsed
+            job.total_seconds += elapsed
+            job.max_seconds = max(job.max_seconds, elapsed)
+        return job.result
@@ -0,0 +1,175 @@
+"""Fast-starting entry point: `python server.py` or `uvicorn server:app --workers N`.
+
+Importing main (pandas, pyarrow, FastAPI and the backend modules) takes
+most of a second, and a worker started with `uvicorn main:app` answers
+nothing until it is done. This module only uses the standard library. Its
+app completes the server's startup at once and imports main in a thread
+right after. Until then, /health answers (status "starting") and every
+other request waits for the import. main's own startup hooks (notification
+dispatcher, scheduler, background prewarm) run as soon as it is loaded, and
+from then on requests go straight to main.app.
+
+/health is for liveness probes and always returns 200 with the import
+timings; /ready returns 503 until main has loaded and started.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+
+started = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+TARGET = os.environ.get('STOCKFLOW_APP', 'main:app')
+# Imported one at a time ahead of main so /health shows where import time goes
+TIMED_IMPORTS = ('numpy', 'pandas', 'pyarrow', 'fastapi')
+
+
+async def _respond(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class LazyApp:
+    """ASGI app that imports `target` ("module:attribute") after the server is up."""
+
+    def __init__(self, target=TARGET):
+        self.target = target
+        self.app = None
+        self.error = None
+        self.timings = {}
+        self._loading = None
+        self._lifespan = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._serve_lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] in ('/health', '/ready'):
+            return await self._serve_health(scope, send)
+        try:
+            app = await self.loaded()
+        except Exception:
+            if scope['type'] == 'http':
+                await _respond(send, 503, self.report())
+            return
+        await app(scope, receive, send)
+
+    async def loaded(self):
+        """Wait until the target app is imported and started, loading it if nobody has yet."""
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+        await asyncio.shield(self._loading)
+        return self.app
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return 'failed'
+        if self._loading is not None and self._loading.done():
+            return 'ready'
+        return 'starting'
+
+    def report(self):
+        report = {"status": self.status, "pid": os.getpid(),
+                  "uptime": round(time.perf_counter() - started, 3),
+                  "timings": {phase: round(seconds, 4) for phase, seconds in self.timings.items()}}
+        if self.error is not None:
+            report["error"] = self.error
+        # The target's own startup and prewarm timings, once it is imported
+        app_timings = getattr(sys.modules.get(self.target.split(':')[0]), 'startup_timings', None)
+        if app_timings is not None:
+            report["app"] = app_timings
+        return report
+
+    async def _serve_health(self, scope, send):
+        report = self.report()
+        ready = scope['path'] == '/health' or report['status'] == 'ready'
+        await _respond(send, 200 if ready else 503, report)
+
+    async def _load(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self.app = await loop.run_in_executor(None, self._import)
+            began = time.perf_counter()
+            await self._forward_lifespan('startup')
+            self.timings['app_startup'] = time.perf_counter() - began
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("Loading %s failed", self.target)
+            raise
+        self.timings['ready'] = time.perf_counter() - started
+        self._register_metrics()
+        logger.info("%s ready after %.2fs", self.target, self.timings['ready'])
+
+    def _import(self):
+        for name in TIMED_IMPORTS:
+            if name not in sys.modules:
+                began = time.perf_counter()
+                importlib.import_module(name)
+                self.timings[f'import_{name}'] = time.perf_counter() - began
+        module_name, attribute = self.target.split(':')
+        began = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.timings[f'import_{module_name}'] = time.perf_counter() - began
+        return getattr(module, attribute)
+
+    def _register_metrics(self):
+        from instrumentation import registry
+
+        registry.gauge('stockflow_server_startup_seconds', 'Time from process start to each loading step.',
+                       lambda: [((phase,), seconds) for phase, seconds in self.timings.items()],
+                       labelnames=['phase'])
+
+    async def _forward_lifespan(self, phase):
+        """Send a lifespan event to the target app and wait for its reply."""
+        if self._lifespan is None:
+            if phase != 'startup':
+                return
+            received, replies = asyncio.Queue(), asyncio.Queue()
+            task = asyncio.ensure_future(self.app(
+                {'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}, received.get, replies.put))
+            self._lifespan = received, replies, task
+        received, replies, task = self._lifespan
+        await received.put({'type': f'lifespan.{phase}'})
+        reply = asyncio.ensure_future(replies.get())
+        await asyncio.wait({reply, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            # The app returned without answering, i.e. it doesn't use lifespan events
+            reply.cancel()
+            self._lifespan = None
+            return
+        message = reply.result()
+        if message['type'].endswith('.failed'):
+            raise RuntimeError(message.get('message') or f"{self.target} {phase} failed")
+
+    async def _serve_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Start loading, but let the server accept connections right away
+                self._loading = self._loading or asyncio.ensure_future(self._load())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._loading is not None:
+                    try:
+                        await self._loading
+                        await self._forward_lifespan('shutdown')
+                    except Exception:
+                        logger.exception("Shutting down %s failed", self.target)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = LazyApp()
+
+if __name__ == "__main__":
+    from workers import serve
+
+    serve("server:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,72 @@
+"""Streaming shortage projection over requirement/movement exports.
+
+scan_horizons() reads the export in chunks with only the date, quantity
+and (optional) material columns. Every row is assigned to the first
+horizon end it falls before, so one pass yields the cumulative totals for
+all horizons and all materials. Rows may come in any date order; the whole
+file is read. Each chunk is folded into running totals per (material,
+horizon), so memory is bounded by the chunk size plus one row per material
+and horizon.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_HORIZONS = (7, 14, 30)
+CHUNK_ROWS = 100_000
+
+
+def scan_horizons(path, date_col, qty_cols, sample_date, horizons=DEFAULT_HORIZONS,
+                  group_col=None, positive_only=False, chunksize=CHUNK_ROWS):
+    """Sum qty_cols over every row dated on or before sample_date + h, for each horizon h.
+
+    Returns one row per (group, horizon) with 'horizon_days', 'end_date' and
+    one total per quantity column. With positive_only, negative quantities
+    (issues/reversals) are ignored, as check-alerts does for Order Qty.
+    """
+    sample_date = pd.Timestamp(sample_date)
+    horizons = sorted(horizons)
+    ends = np.array([sample_date + pd.Timedelta(days=h) for h in horizons], dtype='datetime64[ns]')
+    usecols = [date_col, *qty_cols] + ([group_col] if group_col else [])
+    dtypes = {group_col: str} if group_col else None
+
+    totals = None
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtypes, thousands=',', chunksize=chunksize)
+    for chunk in reader:
+        dates = pd.to_datetime(chunk[date_col], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        # Index of the shortest horizon that still includes each row
+        slot = np.searchsorted(ends, dates, side='left')
+        keep = (slot < len(ends)) & ~np.isnat(dates)
+        if not keep.any():
+            continue
+
+        part = pd.DataFrame({'slot': slot[keep]})
+        for col in qty_cols:
+            qty = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=float)[keep]
+            part[col] = np.where(qty > 0, qty, 0.0) if positive_only else qty
+        keys = ['slot']
+        if group_col:
+            part[group_col] = chunk[group_col].to_numpy()[keep]
+            keys = [group_col, 'slot']
+        part = part.groupby(keys).sum()
+        totals = part if totals is None else totals.add(part, fill_value=0.0)
+
+    return _cumulate(totals, qty_cols, group_col, horizons, ends)
+
+
+def _cumulate(totals, qty_cols, group_col, horizons, ends):
+    slots = pd.Index(range(len(horizons)), name='slot')
+    if totals is None:
+        totals = pd.DataFrame(columns=qty_cols, dtype=float)
+
+    if group_col:
+        groups = totals.index.get_level_values(group_col).unique() if len(totals) else pd.Index([], name=group_col)
+        full = pd.MultiIndex.from_product([groups, slots], names=[group_col, 'slot'])
+        totals = totals.reindex(full, fill_value=0.0).groupby(level=group_col).cumsum()
+    else:
+        totals = totals.reindex(slots, fill_value=0.0).cumsum()
+
+    result = totals.reset_index()
+    result['horizon_days'] = np.asarray(horizons)[result['slot']]
+    result['end_date'] = pd.to_datetime(ends[result['slot']])
+    head = ([group_col] if group_col else []) + ['horizon_days', 'end_date']
+    return result[head + list(qty_cols)]
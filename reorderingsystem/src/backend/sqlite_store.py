@@ -0,0 +1,46 @@
+"""Connection handling shared by the SQLite-backed stores (orders, alerts).
+
+Every uvicorn worker opens the same database file. WAL mode lets readers
+proceed while a writer commits, and _transaction() starts with BEGIN
+IMMEDIATE. That takes SQLite's write lock up front, which serializes the
+read-modify-write sequences of separate processes.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.environ.get('STOCKFLOW_DB', 'stockflow.db')
+
+
+class SQLiteStore:
+    """Base class: one connection per thread to `path`, with `schema` created on first use."""
+
+    schema = ''
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(self.schema)
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
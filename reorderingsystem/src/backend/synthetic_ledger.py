@@ -0,0 +1,114 @@
+"""Synthetic SAP exports shaped like 1111003.csv and 4999122.csv.
+
+The movement ledger and MRP list are generated with the same columns and
+text formats as the real exports: US dates, thousands separators, and '$'
+amounts. The loaders and the benchmark then exercise the same parsing paths
+without the private files. Output is deterministic for a given seed.
+
+Usage: python synthetic_ledger.py OUT_DIR [--rows N] [--materials N] [--years N] [--seed N]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+MOVEMENT_TYPES = {101: 'GR goods receipt', 261: 'GI for order', 311: 'TF trfr within plant',
+                  551: 'GI scrapping', 102: 'GR for PO reversal'}
+PLANTS = ['1000', '2000', '3000']
+STORAGE_LOCATIONS = ['0001', '0002', '0003']
+VENDORS = ['100100', '100200', '100300', '100400']
+MRP_ELEMENTS = ['PurRqs', 'POitem', 'DepReq', 'Transf', 'PlOrd']
+
+
+def _us_dates(dates):
+    return pd.DatetimeIndex(dates).strftime('%m/%d/%Y')
+
+
+def generate_movements(rows=100_000, materials=50, years=5, start='2020-01-01', seed=0):
+    """Material document lines (the 1111003.csv layout), sorted by posting date."""
+    rng = np.random.default_rng(seed)
+    days = int(365 * years)
+    posting = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit='D')
+    material_ids = 1111000 + np.arange(materials)
+    material = rng.choice(material_ids, rows)
+    movement = rng.choice(list(MOVEMENT_TYPES), rows, p=[0.35, 0.35, 0.15, 0.1, 0.05])
+
+    # Receipts are positive, issues negative, with a yearly demand cycle
+    season = 1 + 0.3 * np.sin(2 * np.pi * posting.dayofyear.to_numpy() / 365.25)
+    qty = np.round(rng.gamma(2.0, 120.0, rows) * season)
+    qty = np.where(np.isin(movement, [261, 551, 102]), -qty, qty)
+    amount = qty * rng.uniform(2.5, 4.5, rows)
+
+    has_po = movement == 101
+    frame = pd.DataFrame({
+        'Material': material,
+        'Material description': pd.Series(material).map(lambda m: f'BUTTER UNSALTED {m}').to_numpy(),
+        'Plant': rng.choice(PLANTS, rows),
+        'Storage location': rng.choice(STORAGE_LOCATIONS, rows),
+        'Movement type': movement,
+        'Movement Type Text': pd.Series(movement).map(MOVEMENT_TYPES).to_numpy(),
+        'Material Document': 4900000000 + np.arange(rows),
+        'Posting Date': _us_dates(posting),
+        'Order Qty': qty.astype(int),
+        'Base Unit of Measure': 'KG',
+        'Amt.in Loc.Cur.': [f'${a:,.2f}' for a in amount],
+        'User Name': rng.choice(['JSMITH', 'MLEE', 'BATCHJOB'], rows),
+        'Document Date': _us_dates(posting - pd.to_timedelta(rng.integers(0, 3, rows), unit='D')),
+        'Vendor': np.where(has_po, rng.choice(VENDORS, rows), None),
+        'Purchase order': np.where(has_po, (4500000000 + rng.integers(0, 99999, rows)).astype(str), None),
+        'Reason for Movement': None,
+    })
+    # Running stock per material, never below zero
+    frame['Total stock'] = frame.groupby('Material')['Order Qty'].cumsum().clip(lower=0) + 5000
+    return frame
+
+
+def generate_mrp(rows=20_000, materials=50, start='2024-11-01', days=120, seed=0):
+    """Stock/requirements list lines (the 4999122.csv layout), sorted by planned date."""
+    rng = np.random.default_rng(seed + 1)
+    planned = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit='D')
+    element = rng.choice(MRP_ELEMENTS, rows)
+    qty = rng.integers(50, 3000, rows)
+    qty = np.where(np.isin(element, ['DepReq', 'Transf']), -qty, qty)
+    available = 20000 + np.cumsum(qty)
+    rescheduled = np.where(rng.random(rows) < 0.1, _us_dates(planned + pd.Timedelta(days=7)), None)
+    return pd.DataFrame({
+        'Planned dates': _us_dates(planned),
+        'MRP element': element,
+        'MRP elmnt data': [f'{e}/{m}' for e, m in zip(element, rng.choice(1111000 + np.arange(materials), rows))],
+        'Rescheduling date': rescheduled,
+        'Exception': np.where(rng.random(rows) < 0.05, '10', None),
+        'Rec./reqd qty': [f'{q:,}' for q in qty],
+        'Avail. Quantity': [f'{a:,}' for a in available],
+        'Plng Plant': rng.choice(PLANTS, rows),
+        'Stor. Loc.': rng.choice(STORAGE_LOCATIONS, rows),
+        'Rec P. Qty': 0,
+        'Day of the Week': planned.day_name().to_numpy(),
+    })
+
+
+def write_ledgers(out_dir, rows=100_000, materials=50, years=5, seed=0):
+    """Write 1111003.csv and 4999122.csv into out_dir; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    movements_path = os.path.join(out_dir, '1111003.csv')
+    mrp_path = os.path.join(out_dir, '4999122.csv')
+    movements = generate_movements(rows, materials, years, seed=seed)
+    # The MRP horizon starts where the movement history ends
+    last_posting = pd.to_datetime(movements['Posting Date'].iloc[-1], format='%m/%d/%Y')
+    generate_mrp(max(rows // 5, 1), materials, start=last_posting, seed=seed).to_csv(mrp_path, index=False)
+    movements.to_csv(movements_path, index=False)
+    return movements_path, mrp_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--materials', type=int, default=50)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for path in write_ledgers(args.out_dir, args.rows, args.materials, args.years, args.seed):
+        print(path)
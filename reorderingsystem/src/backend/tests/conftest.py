@@ -0,0 +1,48 @@
+"""Shared fixtures for the backend tests.
+
+The backend modules import each other by name, so the backend directory
+goes on sys.path. Ledgers come from synthetic_ledger and are kept small,
+so the whole suite runs in a few seconds. main reads 1111003.csv and keeps
+its SQLite stores and model files relative to the working directory, so
+the API tests import it from a temporary directory.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from synthetic_ledger import generate_movements  # noqa: E402
+
+
+@pytest.fixture
+def movements():
+    """Two years of postings for a handful of materials, in posting-date order."""
+    return generate_movements(rows=3000, materials=5, years=2, seed=1)
+
+
+@pytest.fixture(scope='session')
+def main_module(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('backend')
+    # 2020-2024: the /forecast model is tested on the 2024 postings
+    generate_movements(rows=4000, materials=5, years=5, seed=1).to_csv(workdir / '1111003.csv', index=False)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(workdir)
+        patch.setenv('STOCKFLOW_PREWARM', '0')
+        import main
+        yield main
+
+
+@pytest.fixture
+def client(main_module):
+    from fastapi.testclient import TestClient
+
+    with TestClient(main_module.app) as client:
+        yield client
+
+
+def write_csv(frame, path, append=False):
+    frame.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+    return str(path)
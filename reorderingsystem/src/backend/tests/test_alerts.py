@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from alert_store import AlertStore
+
+NOW = datetime(2024, 11, 15, 8, 0)
+
+
+def _alert(material_id='1111003', description='Projected shortage of 3.00 kg', **changes):
+    return {'id': 1, 'type': 'critical', 'material_id': material_id, 'horizon_days': 7,
+            'description': description, 'timestamp': NOW.isoformat(), **changes}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AlertStore(str(tmp_path / 'alerts.db'), dedup_window=3600)
+
+
+def test_unchanged_alert_is_sent_once_per_window(store):
+    assert store.record('ledger', 'v1', [_alert()], now=NOW) == [_alert()]
+
+    # A later evaluation raises it again; only the volatile fields differ
+    again = _alert(id=2, timestamp=(NOW + timedelta(minutes=30)).isoformat())
+    assert store.record('ledger', 'v2', [again], now=NOW + timedelta(minutes=30)) == []
+    assert store.record('ledger', 'v3', [again], now=NOW + timedelta(minutes=59)) == []
+    assert store.record('ledger', 'v4', [again], now=NOW + timedelta(minutes=61)) == [again]
+
+
+def test_changed_alert_is_sent_within_the_window(store):
+    store.record('ledger', 'v1', [_alert()], now=NOW)
+
+    worse = _alert(description='Projected shortage of 5.00 kg')
+    assert store.record('ledger', 'v2', [worse], now=NOW + timedelta(minutes=5)) == [worse]
+
+
+def test_cleared_alerts_are_no_longer_active(store):
+    store.record('ledger', 'v1', [_alert('A'), _alert('B')], now=NOW)
+    store.record('ledger', 'v2', [_alert('B')], now=NOW + timedelta(minutes=5))
+
+    assert [a['material_id'] for a in store.active_alerts()] == ['B']
+    assert store.active_alerts('A') == []
+    assert store.evaluation('ledger', 'v2') == [_alert('B')]
+    assert store.evaluation('ledger', 'v1') is None
+
+
+def test_active_alerts_endpoint(client, main_module):
+    main_module.alert_store.record('endpoint-test', 'v1', [_alert('1111998')])
+
+    response = client.get('/api/inventory/alerts', params={'material_id': '1111998'})
+
+    assert response.status_code == 200
+    assert response.json() == [_alert('1111998')]
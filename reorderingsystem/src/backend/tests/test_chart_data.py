@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.parametrize('query', [
+    'points=0', 'points=2', 'points=-5', 'points=3&method=minmax', 'method=average', 'points=many',
+    'bucket=year', 'bucket=',
+])
+def test_invalid_downsampling_is_rejected(client, query):
+    assert client.get(f'/api/inventory/chart-data?{query}').status_code == 422
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_points_limits_the_series(client, method):
+    full = client.get('/api/inventory/chart-data').json()
+    reduced = client.get(f'/api/inventory/chart-data?points=50&method={method}').json()
+
+    assert len(full) > 50
+    assert 4 <= len(reduced) <= 50
+    assert reduced[0] == full[0] and reduced[-1] == full[-1]
+
+
+def test_date_range_and_bucket(client):
+    rows = client.get('/api/inventory/chart-data?start=2020-03-01&end=2020-05-31&bucket=month').json()
+
+    assert [row['date'] for row in rows] == ['2020-03-01', '2020-04-01', '2020-05-01']
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pytest
+
+import demand_model
+from demand_model import FEATURES, LAGS, ROLLING_WINDOW, train_matrix
+from online_models import grow_forest
+
+
+@pytest.fixture
+def winner_file(tmp_path, monkeypatch):
+    path = tmp_path / 'backtest_winner.json'
+    monkeypatch.setattr(demand_model, 'MODEL_CHOICE_PATH', str(path))
+
+    def write(model, lags=LAGS, window=ROLLING_WINDOW):
+        path.write_text(json.dumps({'model': model, 'lags': lags, 'window': window, 'relative_rmse': 0.5}))
+    return write
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, len(FEATURES)))
+    return X, X @ rng.normal(size=len(FEATURES))
+
+
+def test_default_without_a_winner(winner_file, matrix):
+    model, train_size = train_matrix(*matrix)
+
+    assert type(model).__name__ == 'RandomForestRegressor'
+    assert model.max_depth == 10
+    assert train_size == 32
+
+
+@pytest.mark.parametrize('name, estimator', [('ridge', 'Ridge'), ('gbr', 'GradientBoostingRegressor'),
+                                             ('rf_depth5', 'RandomForestRegressor')])
+def test_backtest_winner_is_trained(winner_file, matrix, name, estimator):
+    winner_file(name)
+
+    model, _ = train_matrix(*matrix)
+
+    assert type(model).__name__ == estimator
+
+
+def test_naive_winner_repeats_lag_1(winner_file, matrix):
+    winner_file('naive')
+    X, y = matrix
+
+    model, _ = train_matrix(X, y)
+
+    np.testing.assert_array_equal(model.predict(X), X[:, FEATURES.index('lag_1')])
+
+
+@pytest.mark.parametrize('winner', [
+    {'model': 'ridge', 'lags': 6, 'window': 4},  # scored on features production doesn't build
+    {'model': 'svr'},
+])
+def test_unusable_winner_falls_back_to_the_default(winner_file, matrix, winner):
+    winner_file(**winner)
+
+    model, _ = train_matrix(*matrix)
+
+    assert type(model).__name__ == 'RandomForestRegressor'
+
+
+def test_only_forests_grow(winner_file, matrix):
+    X, y = matrix
+    forest, _ = train_matrix(X, y)
+    winner_file('ridge')
+    ridge, _ = train_matrix(X, y)
+
+    assert grow_forest(forest, X[-12:], y[-12:])
+    assert len(forest.estimators_) == 110
+    assert not grow_forest(ridge, X[-12:], y[-12:])
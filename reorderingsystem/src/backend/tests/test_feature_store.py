@@ -0,0 +1,74 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from demand_model import FEATURES, add_lags, create_features
+from feature_store import FeatureStore, FeatureTable
+from ledger_snapshot import clean_frame
+
+
+@pytest.fixture
+def ledger(movements):
+    return clean_frame(movements)
+
+
+def _assert_matches_create_features(table, postings, key=None):
+    X, y, dates = table.matrix(key)
+    expected = add_lags(create_features(postings))
+
+    np.testing.assert_allclose(X, expected[FEATURES].to_numpy(dtype=float))
+    np.testing.assert_allclose(y, expected['Order Qty'].to_numpy(dtype=float))
+    np.testing.assert_array_equal(dates, expected['Posting Date'].to_numpy())
+
+
+def test_matrix_matches_create_features(ledger):
+    _assert_matches_create_features(FeatureTable.build(ledger), ledger)
+
+
+def test_per_material_matrix_matches_create_features(ledger):
+    table = FeatureTable.build(ledger, ['Material'])
+
+    for material in ledger['Material'].astype(str).unique():
+        _assert_matches_create_features(table, ledger[ledger['Material'].astype(str) == material], material)
+
+
+def test_extended_table_matches_a_rebuild(ledger):
+    table, how = FeatureTable.build(ledger.iloc[:2000]).updated(ledger)
+
+    assert how == 'extend'
+    _assert_matches_create_features(table, ledger)
+
+
+def test_workers_build_a_version_once(tmp_path, ledger, monkeypatch):
+    builds = []
+    updated = FeatureTable.updated
+    monkeypatch.setattr(FeatureTable, 'updated', lambda self, frame: builds.append(1) or updated(self, frame))
+    # One store per worker, sharing the directory
+    stores = [FeatureStore(str(tmp_path), keep_versions=2) for _ in range(4)]
+    tables = [None] * len(stores)
+
+    def get(i):
+        tables[i] = stores[i].get(ledger, 'v1')
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(len(stores))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    for table in tables:
+        np.testing.assert_array_equal(table.matrix()[0], tables[0].matrix()[0])
+
+
+def test_old_versions_are_pruned(tmp_path, ledger):
+    store = FeatureStore(str(tmp_path), keep_versions=2)
+    for version, rows in enumerate((1000, 2000, 3000)):
+        store.get(ledger.iloc[:rows], f'v{version}')
+
+    assert sorted(f for f in os.listdir(tmp_path / 'all_2W') if f.endswith('.joblib')) == ['v1.joblib',
+                                                                                            'v2.joblib']
+    # A restarted worker loads the current version from disk
+    table = FeatureStore(str(tmp_path)).get(ledger, 'v2')
+    assert len(table.matrix()[0]) == len(store.get(ledger, 'v2').matrix()[0])
@@ -0,0 +1,146 @@
+import pandas as pd
+import pytest
+
+import incremental_ledger
+from conftest import write_csv
+from incremental_ledger import IncrementalLedger
+from ledger_snapshot import PROJECTIONS
+
+
+def _loaded(path):
+    ledger = IncrementalLedger(path, columns=PROJECTIONS['dashboard'])
+    ledger.refresh()
+    return ledger
+
+
+def _assert_same_ledger(ledger, expected):
+    pd.testing.assert_frame_equal(ledger.frame, expected.frame, check_categorical=False)
+    pd.testing.assert_frame_equal(ledger.aggregates.daily, expected.aggregates.daily, check_freq=False)
+    assert ledger.aggregates.kpis() == pytest.approx(expected.aggregates.kpis())
+    pd.testing.assert_series_equal(ledger.aggregates.stock_by_material.sort_index(),
+                                   expected.aggregates.stock_by_material.sort_index())
+    for bucket in ('week', 'month'):
+        pd.testing.assert_frame_equal(ledger.rollup(bucket), expected.rollup(bucket))
+
+
+def test_appended_rows_match_full_reload(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    write_csv(movements.iloc[2000:2500], path, append=True)
+    assert ledger.refresh() == 500
+    write_csv(movements.iloc[2500:], path, append=True)
+    assert ledger.refresh() == 500
+    assert ledger.refresh() == 0
+
+    assert (ledger.full_loads, ledger.tail_loads) == (1, 2)
+    _assert_same_ledger(ledger, _loaded(path))
+
+
+def test_single_posting_tails_are_appended(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    # One posting at a time: a tail may lack values (e.g. no vendor) the frame's categories have
+    for position in range(2000, 2020):
+        write_csv(movements.iloc[position:position + 1], path, append=True)
+        assert ledger.refresh() == 1
+
+    assert (ledger.full_loads, ledger.tail_loads) == (1, 20)
+    _assert_same_ledger(ledger, _loaded(path))
+
+
+def test_tails_with_new_categories_match_full_reload(tmp_path, movements, monkeypatch):
+    monkeypatch.setattr(incremental_ledger, 'MAX_PENDING_TAILS', 3)
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    tail = movements.iloc[2000:2010].copy()
+    tail['Storage location'] = '0009'
+    tail['Vendor'] = '999999'
+    for position in range(0, 10, 2):
+        write_csv(tail.iloc[position:position + 2], path, append=True)
+        ledger.refresh()
+    # The totals are current before the frame is read
+    assert ledger.aggregates.rows == 2010
+
+    assert set(ledger.frame['Storage location'].iloc[-10:]) == {9}
+    _assert_same_ledger(ledger, _loaded(path))
+
+
+def test_back_dated_tail_matches_full_reload(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    # Postings for days the ledger already covers
+    write_csv(movements.iloc[1500:1600], path, append=True)
+    ledger.refresh()
+
+    assert ledger.tail_loads == 1
+    _assert_same_ledger(ledger, _loaded(path))
+
+
+def test_rewritten_export_is_reloaded(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    # Regenerated with a corrected posting in the already-consumed part, and longer
+    rewritten = movements.copy()
+    rewritten.loc[1999, 'Order Qty'] += 1
+    write_csv(rewritten, path)
+    ledger.refresh()
+
+    assert ledger.full_loads == 2
+    _assert_same_ledger(ledger, _loaded(path))
+
+
+def test_rewritten_first_posting_is_reloaded(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    # Same size, only a digit of the first posting changed: the guard before the offset alone misses it
+    data = bytearray(open(path, 'rb').read())
+    digit = next(i for i in range(data.index(b'\n') + 1, len(data)) if chr(data[i]).isdigit())
+    data[digit] = ord('2') if data[digit] == ord('1') else ord('1')
+    open(path, 'wb').write(bytes(data))
+    ledger.refresh()
+
+    assert ledger.full_loads == 2
+
+
+def test_export_changing_during_every_load_is_an_error(tmp_path, movements, monkeypatch):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+    load_ledger = incremental_ledger.load_ledger
+    appended = iter(range(2000, 3000, 10))
+
+    def load_while_writing(csv_path, columns=None):
+        frame = load_ledger(csv_path, columns=columns)
+        start = next(appended)
+        write_csv(movements.iloc[start:start + 10], csv_path, append=True)
+        return frame
+
+    monkeypatch.setattr(incremental_ledger, 'load_ledger', load_while_writing)
+    # A shorter export was written: needs a full load
+    write_csv(movements.iloc[:1500], path)
+
+    with pytest.raises(RuntimeError, match='kept changing'):
+        ledger.refresh()
+    # The previous, consistent frame is still served
+    assert len(ledger.frame) == 2000
+
+
+def test_export_without_postings(tmp_path, movements):
+    path = write_csv(movements.iloc[:0], tmp_path / '1111003.csv')
+    ledger = _loaded(path)
+
+    assert ledger.aggregates.kpis()['currentStock'] is None
+    assert ledger.aggregates.kpis()['stockChange'] == 0.0
+    assert ledger.rollup('week').empty
+    assert ledger.refresh() == 0
+
+    write_csv(movements.iloc[:100], path, append=True)
+    assert ledger.refresh() == 100
+    assert (ledger.full_loads, ledger.tail_loads) == (2, 0)
+    assert ledger.aggregates.kpis()['currentStock'] == float(movements['Total stock'].iloc[99])
+    _assert_same_ledger(ledger, _loaded(path))
@@ -0,0 +1,38 @@
+import threading
+
+import pandas as pd
+
+import ledger_snapshot
+from conftest import write_csv
+from ledger_snapshot import is_fresh, load_ledger, snapshot_path
+
+
+def test_concurrent_loads_ingest_a_stale_snapshot_once(tmp_path, movements, monkeypatch):
+    path = write_csv(movements, tmp_path / '1111003.csv')
+    parses = []
+    parse_csv = ledger_snapshot.parse_csv
+    monkeypatch.setattr(ledger_snapshot, 'parse_csv',
+                        lambda csv_path, columns=None: parses.append(csv_path) or parse_csv(csv_path, columns))
+    frames = [None] * 4
+
+    def load(i):
+        frames[i] = load_ledger(path)
+    threads = [threading.Thread(target=load, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert parses == [path]
+    assert is_fresh(path, snapshot_path(path))
+    for frame in frames[1:]:
+        pd.testing.assert_frame_equal(frame, frames[0])
+
+
+def test_changed_export_is_ingested_again(tmp_path, movements):
+    path = write_csv(movements.iloc[:2000], tmp_path / '1111003.csv')
+    assert len(load_ledger(path)) == 2000
+
+    write_csv(movements.iloc[2000:], path, append=True)
+
+    assert len(load_ledger(path)) == len(movements)
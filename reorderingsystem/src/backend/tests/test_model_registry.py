@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry
+
+
+def _bundle(version):
+    return {'version': version, 'test_actual': np.arange(version + 1.0), 'metrics': {'version': version}}
+
+
+def _update(bundle):
+    return _bundle(bundle['version'] + 1)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path), keep_versions=2, persist_every=3)
+
+
+def _written(registry):
+    directory = os.path.join(registry.root, 'forecast')
+    return sorted(f[:-len('.joblib')] for f in os.listdir(directory) if f.endswith('.joblib'))
+
+
+def test_training_is_written_at_once(registry):
+    registry.get('forecast', 'v0', lambda: _bundle(0), update_fn=_update)
+
+    assert _written(registry) == ['v0']
+
+
+def test_updates_are_written_every_persist_every(registry):
+    registry.get('forecast', 'v0', lambda: _bundle(0), update_fn=_update)
+    for version in (1, 2):
+        assert registry.get('forecast', f'v{version}', None, update_fn=_update)['version'] == version
+    assert _written(registry) == ['v0']
+
+    registry.get('forecast', 'v3', None, update_fn=_update)
+    assert _written(registry) == ['v0', 'v3']
+
+
+def test_flush_writes_pending_updates(registry):
+    registry.get('forecast', 'v0', lambda: _bundle(0), update_fn=_update)
+    registry.get('forecast', 'v1', None, update_fn=_update)
+
+    registry.flush()
+
+    assert _written(registry) == ['v0', 'v1']
+    # A restarted worker starts from the flushed update
+    restarted = ModelRegistry(registry.root)
+    bundle = restarted.get('forecast', 'v1', None, update_fn=_update)
+    np.testing.assert_array_equal(bundle['test_actual'], _bundle(1)['test_actual'])
+    registry.flush()
+    assert _written(registry) == ['v0', 'v1']
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def trainings(main_module, monkeypatch):
+    """Counts full trainings of the forecast and horizon models."""
+    counts = {'forecast': 0, 'horizon': 0}
+
+    def counted(name, train):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return train(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(main_module, 'train_forecast_model', counted('forecast', main_module.train_forecast_model))
+    monkeypatch.setattr(main_module, 'train_horizon_model', counted('horizon', main_module.train_horizon_model))
+    return counts
+
+
+@pytest.mark.parametrize('name, path', [
+    ('forecast', '/api/inventory/forecast'),
+    ('horizon', '/api/inventory/forecast/horizon'),
+])
+def test_retraining_is_a_post(client, trainings, name, path):
+    # Warm the registry; later GETs, even with the old ?retrain flag, only read it
+    assert client.get(path).status_code == 200
+    before = trainings[name]
+    assert client.get(f'{path}?retrain=true').status_code == 200
+    assert trainings[name] == before
+
+    response = client.post(f'{path}/retrain')
+
+    assert response.status_code == 200
+    assert 'metrics' in response.json()
+    assert trainings[name] == before + 1
+    assert client.get(f'{path}?retrain=true').status_code == 200
+    assert trainings[name] == before + 1
+
+
+def test_appended_postings_update_the_forecast_without_a_reparse(client, main_module, monkeypatch):
+    import ledger_snapshot
+
+    assert client.get('/api/inventory/forecast').status_code == 200
+    before = main_module.forecast_bundle()
+    parses = []
+    parse_csv = ledger_snapshot.parse_csv
+
+    def counted_parse(*args, **kwargs):
+        parses.append(args)
+        return parse_csv(*args, **kwargs)
+
+    monkeypatch.setattr(ledger_snapshot, 'parse_csv', counted_parse)
+
+    with open(main_module.LEDGER_PATH, 'rb') as f:
+        posting = f.read().splitlines()[-1] + b'\n'
+    with open(main_module.LEDGER_PATH, 'ab') as f:
+        f.write(posting * 2)
+    assert client.get('/api/inventory/forecast').status_code == 200
+    updated = main_module.forecast_bundle()
+
+    assert parses == []
+    assert client.get('/api/inventory/forecast').json()['forecastData'][0]['date'] == str(updated['test_dates'][0])
+    assert updated['source_rows'] == before['source_rows'] + 2
+    assert updated['metrics']['incremental_updates'] == before['metrics'].get('incremental_updates', 0) + 1
+    np.testing.assert_allclose(updated['test_predicted'], main_module.train_forecast_model()['test_predicted'])
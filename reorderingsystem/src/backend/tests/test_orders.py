@@ -0,0 +1,72 @@
+import pandas as pd
+
+from order_store import OrderStore
+
+
+def _order(material_id, status='pending', quantity=100.0):
+    now = pd.Timestamp('2024-11-15 08:00')
+    return {'material_id': material_id, 'quantity': quantity, 'status': status, 'created_at': now,
+            'vendor': '100100', 'expected_delivery': now + pd.Timedelta(days=3)}
+
+
+def test_created_orders_get_consecutive_ids(tmp_path):
+    store = OrderStore(str(tmp_path / 'orders.db'))
+
+    first = store.create_orders(pd.DataFrame([_order('A'), _order('B')]))
+    second = store.create_orders(pd.DataFrame([_order('C')]))
+
+    assert [o['id'] for o in first + second] == [1, 2, 3]
+    assert store.get_order(3)['material_id'] == 'C'
+    assert store.get_order(4) is None
+
+
+def test_get_order_endpoint(client, main_module):
+    created = main_module.order_store.create_orders(pd.DataFrame([_order('1111999')]))
+
+    response = client.get(f"/api/inventory/orders/{created[0]['id']}")
+
+    assert response.status_code == 200
+    assert response.json()['material_id'] == '1111999'
+    assert client.get('/api/inventory/orders/999999').status_code == 404
+
+
+def test_materials_with_an_open_order_are_not_ordered_again(tmp_path):
+    store = OrderStore(str(tmp_path / 'orders.db'))
+    store.create_orders(pd.DataFrame([_order('A'), _order('B', status='delivered')]))
+
+    created = store.create_orders(pd.DataFrame([_order('A'), _order('B'), _order('C'), _order('C')]))
+
+    assert [o['material_id'] for o in created] == ['B', 'C']
+    assert [o['id'] for o in created] == [3, 4]
+    # Once it arrives the material can be ordered again
+    store.update_order_status(1, 'delivered')
+    assert [o['material_id'] for o in store.create_orders(pd.DataFrame([_order('A')]))] == ['A']
+
+
+def test_largest_order_per_material_is_kept(tmp_path, caplog):
+    store = OrderStore(str(tmp_path / 'orders.db'))
+    store.create_orders(pd.DataFrame([_order('A')]))
+
+    with caplog.at_level('INFO', logger='order_store'):
+        created = store.create_orders(pd.DataFrame([
+            _order('A', quantity=900.0), _order('B', quantity=200.0), _order('C'), _order('B', quantity=500.0),
+            _order('B', quantity=300.0),
+        ]))
+
+    assert [(o['material_id'], o['quantity']) for o in created] == [('C', 100.0), ('B', 500.0)]
+    assert 'Not ordering A again' in caplog.text
+    assert 'B x 200, B x 300' in caplog.text
+
+
+def test_second_reorder_cycle_creates_nothing(client, main_module):
+    for material_id in ('1111000', '1111001', '9999999'):
+        rule = {'material_id': material_id, 'min_stock': 0, 'reorder_point': 1e9, 'order_quantity': 500,
+                'vendor': '100100', 'lead_time_days': 3}
+        assert client.post('/api/inventory/reorder-rules', json=rule).status_code == 200
+
+    first = main_module.run_reorder_cycle()
+    second = main_module.run_reorder_cycle()
+
+    assert sorted(o['material_id'] for o in first['orders']) == ['1111000', '1111001', '9999999']
+    assert second['orders'] == []
+    assert len(main_module.order_store.list_orders(status='pending', material_id='1111000')) == 1
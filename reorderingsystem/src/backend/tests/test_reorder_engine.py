@@ -0,0 +1,26 @@
+import pandas as pd
+
+from instrumentation import CACHE_EVENTS
+from ledger_cache import ledger_cache
+from reorder_engine import material_forecasts
+
+
+def _events(cache):
+    return {labels[1]: value for _, _, labels, value in CACHE_EVENTS.samples() if labels[0] == cache}
+
+
+def test_forecast_table_has_its_own_cache(tmp_path):
+    path = tmp_path / 'forecasts.csv'
+    pd.DataFrame({'Material': ['A', 'A', 'B'], 'Plant': ['P1', 'P2', 'P1'], 'forecast': [1.0, 2.0, None],
+                  'periods': [20, 20, 3], 'status': ['ok', 'ok', 'insufficient_history']}).to_csv(path, index=False)
+    ledger_events, ledger_entries = _events('ledger'), ledger_cache.stats()['entries']
+    before = _events('forecasts')
+
+    forecasts = material_forecasts(str(path))
+    assert material_forecasts(str(path)) is forecasts
+
+    assert forecasts.to_dict() == {'A': 3.0}
+    after = _events('forecasts')
+    assert after.get('miss', 0) - before.get('miss', 0) == 1
+    assert after.get('hit', 0) - before.get('hit', 0) == 1
+    assert (_events('ledger'), ledger_cache.stats()['entries']) == (ledger_events, ledger_entries)
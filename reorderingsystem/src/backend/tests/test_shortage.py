@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shortage import scan_horizons
+from synthetic_ledger import generate_mrp
+
+SAMPLE_DATE = pd.Timestamp('2024-11-15')
+QTY_COLS = ['Avail. Quantity', 'Rec./reqd qty']
+
+
+@pytest.fixture
+def mrp():
+    return generate_mrp(rows=2000, materials=5, start='2024-11-01', days=60, seed=3)
+
+
+def _expected(mrp, horizon):
+    dates = pd.to_datetime(mrp['Planned dates'], format='%m/%d/%Y')
+    within = mrp[dates <= SAMPLE_DATE + pd.Timedelta(days=horizon)]
+    return [within[col].str.replace(',', '').astype(float).sum() for col in QTY_COLS]
+
+
+@pytest.mark.parametrize('order', ['sorted', 'shuffled', 'reversed'])
+def test_totals_do_not_depend_on_row_order(tmp_path, mrp, order):
+    if order == 'shuffled':
+        mrp = mrp.sample(frac=1, random_state=0)
+    elif order == 'reversed':
+        mrp = mrp.iloc[::-1]
+    path = tmp_path / '4999122.csv'
+    mrp.to_csv(path, index=False)
+
+    projections = scan_horizons(path, 'Planned dates', QTY_COLS, SAMPLE_DATE, horizons=(7, 14, 30), chunksize=250)
+
+    assert projections['horizon_days'].tolist() == [7, 14, 30]
+    np.testing.assert_allclose(projections[QTY_COLS].to_numpy(), [_expected(mrp, h) for h in (7, 14, 30)])
+
+
+def test_grouped_totals_do_not_depend_on_chunking(tmp_path, mrp):
+    path = tmp_path / '4999122.csv'
+    mrp.to_csv(path, index=False)
+
+    scan = lambda chunksize: scan_horizons(path, 'Planned dates', QTY_COLS, SAMPLE_DATE,
+                                           group_col='MRP element', chunksize=chunksize)
+    whole, chunked = scan(10_000), scan(7)
+
+    assert len(whole) == mrp['MRP element'].nunique() * 3
+    pd.testing.assert_frame_equal(chunked, whole)
@@ -0,0 +1,68 @@
+"""Objects persisted per ledger fingerprint under <root>/<name>/<fingerprint>.joblib.
+
+ModelRegistry (trained models) and FeatureStore (feature tables) share
+this layout. Files are written to a temporary name and renamed into
+place, only the newest keep_versions are kept, and locked() serializes
+building a version across threads and worker processes.
+"""
+import os
+
+from workers import file_lock
+
+
+class VersionedStore:
+    """Base class: the last object per name in memory, the latest versions on disk."""
+
+    # joblib.load's mmap_mode; 'c' shares numpy arrays between workers through the page cache
+    mmap_mode = None
+    # Files written next to <fingerprint>.joblib and pruned along with it
+    sidecars = ()
+
+    def __init__(self, root, keep_versions=2):
+        self.root = root
+        self.keep_versions = keep_versions
+        self._loaded = {}  # name -> (fingerprint, object)
+
+    def locked(self, name):
+        """Lock held by one thread of one worker at a time, per name."""
+        return file_lock(os.path.join(self.root, name, '.lock'))
+
+    def _path(self, name, fingerprint):
+        return os.path.join(self.root, name, f"{fingerprint}.joblib")
+
+    def _load(self, path):
+        import joblib
+
+        return joblib.load(path, mmap_mode=self.mmap_mode)
+
+    def _latest(self, name):
+        """(fingerprint, object) of the newest version on disk, if any."""
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return None
+        paths = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.joblib')]
+        if not paths:
+            return None
+        newest = max(paths, key=os.path.getmtime)
+        return os.path.basename(newest)[:-len('.joblib')], self._load(newest)
+
+    def _dump(self, name, fingerprint, value):
+        """Write a version atomically, so readers in other processes never see a partial file."""
+        import joblib
+
+        path = self._path(name, fingerprint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def _prune(self, name):
+        directory = os.path.join(self.root, name)
+        paths = sorted((os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.joblib')),
+                       key=os.path.getmtime)
+        for path in paths[:-self.keep_versions]:
+            base = path[:-len('.joblib')]
+            for stale in (path, *(base + suffix for suffix in self.sidecars)):
+                if os.path.exists(stale):
+                    os.remove(stale)
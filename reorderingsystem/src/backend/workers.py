@@ -0,0 +1,119 @@
+"""Multi-worker serving: CPU offloading, cross-process locks and the server entry point.
+
+The handlers do their pandas/sklearn work through run_cpu(). That runs it
+on a small dedicated thread pool, so the event loop keeps accepting and
+answering cheap requests while a forecast trains. serve() starts
+STOCKFLOW_WORKERS uvicorn processes, which mostly don't share the ledger's
+memory. The Arrow snapshot (ledger_snapshot) is memory-mapped, and the
+columns of a date-ordered export without nulls start out shared through the
+OS page cache. They stay shared only until the worker's IncrementalLedger
+sorts the frame or merges appended postings into it, which builds private
+columns, so budget roughly one ledger frame per worker. Model arrays are
+memory-mapped from the registry's files and stay shared until a worker
+updates the model.
+
+file_lock() serializes work across processes, e.g. one worker training a
+model version while the others wait and then load it from disk.
+LeaderLock elects the one worker that runs the background scheduler.
+Both use flock(), and without it (Windows) they only lock within the
+process. A single-worker deployment works the same either way.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from instrumentation import profiling
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.environ.get('STOCKFLOW_WORKERS', 1))
+# Threads per worker for CPU-bound handlers; more mostly adds GIL contention
+CPU_THREADS = int(os.environ.get('STOCKFLOW_CPU_THREADS', min(4, os.cpu_count() or 1)))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_THREADS, thread_name_prefix='stockflow-cpu')
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the CPU pool and await its result."""
+    call = partial(func, *args, **kwargs)
+    # cProfile only sees the thread it runs on; keep profiled requests on the loop
+    if profiling.get():
+        return call()
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, context.run, call)
+
+
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _process_lock(path):
+    with _process_locks_guard:
+        return _process_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` across threads and processes, held for the block."""
+    with _process_lock(path):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class LeaderLock:
+    """Non-blocking lock one process keeps for its lifetime (or until release())."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        f = open(self.path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None and fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+
+def serve(app='main:app', host='0.0.0.0', port=8000, workers=WORKERS):
+    import uvicorn
+
+    logger.info("Serving %s with %d worker(s), %d CPU thread(s) each", app, workers, CPU_THREADS)
+    # uvicorn needs an import string to start more than one worker
+    uvicorn.run(app, host=host, port=port, workers=workers)
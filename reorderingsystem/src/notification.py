@@ -1,77 +1,25 @@
-import requests
-import json
 import pandas as pd
- 
-# Load data
-store_sales = pd.read_csv("4999122.csv")
- 
-# Check data info
-store_sales.info()
- 
-# Check for missing values
-print(store_sales.isnull().sum())
- 
-# Data Preprocessing
-# Drop unnecessary columns
-store_sales = store_sales.drop(columns=['MRP element','MRP elmnt data','Rescheduling date',
-                                        'Exception','Plng Plant','Stor. Loc.','Rec P. Qty',
-                                        'Day of the Week'],axis=1)
- 
-# Convert date and numeric columns
-store_sales['Planned dates'] = pd.to_datetime(store_sales['Planned dates'])
-store_sales['Rec./reqd qty'] = store_sales['Rec./reqd qty'].str.replace(',', '').astype(float)
-store_sales['Avail. Quantity'] = store_sales['Avail. Quantity'].str.replace(',', '').astype(float)
- 
-# Calculate cumulative sums for 'Avail. Quantity' and 'Rec./reqd qty'
-store_sales['Cumulative Available'] = store_sales['Avail. Quantity'].cumsum()
-store_sales['Cumulative Required'] = store_sales['Rec./reqd qty'].cumsum()
- 
-# Print the data to verify the new columns
-print(store_sales[['Planned dates', 'Cumulative Available', 'Cumulative Required']])
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from shortage import scan_horizons
+from notifications import send_teams_notification
  
 # Sample date for checking
 sample_date = pd.to_datetime('2024-11-15')  # Replace with any date you want to check
  
- 
- 
-def send_teams_notification(recipients, message):
-    # Retrieve Teams link (you can replace this with your own link retrieval logic)
-    teams_link = ""  # Replace with your Teams link URL
- 
-    # Prepare the payload data
-    payload = {
-        "Recipients": recipients,
-        "Message": message
-    }
- 
-    # Serialize payload to JSON
-    json_payload = json.dumps(payload)
- 
-    # Set the headers for the request
-    headers = {
-        "Content-Type": "application/json"
-    }
- 
-    # Send POST request to Power Automate flow endpoint
-    response = requests.post(teams_link, data=json_payload, headers=headers)
- 
-    # Check the response status
-    if response.status_code == 200:
-        print("Notification sent successfully!")
-    else:
-        
-        #print(f"Failed to send notification. Status code: {response.status_code}")
-        print(response.text)
+# Stream the MRP list in chunks, keeping only the columns the check needs
+projection = scan_horizons("4999122.csv", 'Planned dates', ['Avail. Quantity', 'Rec./reqd qty'],
+                           sample_date, horizons=(14,)).iloc[0]
  
 # Example usage
 recipients = "example@example.com"  # Replace with actual recipients
  
-end_date = sample_date + pd.Timedelta(days=14)
-filtered_data = store_sales[store_sales['Planned dates'] <= end_date]
+end_date = projection['end_date']
  
-# Sum up the cumulative Available and Required quantities up to the end_date
-cumulative_available = filtered_data['Avail. Quantity'].sum()
-cumulative_required = filtered_data['Rec./reqd qty'].sum()
+# Cumulative Available and Required quantities up to the end_date
+cumulative_available = projection['Avail. Quantity']
+cumulative_required = projection['Rec./reqd qty']
  
 # Adjust the sign of cumulative_required based on its value
 if cumulative_required < 0: